@@ -3,7 +3,6 @@ from __future__ import annotations
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 import pandas as pd
-from sqlalchemy import create_engine
 
 from langchain.tools import Tool
 from langchain.chat_models import init_chat_model
@@ -11,6 +10,7 @@ from langgraph.prebuilt import create_react_agent
 
 from typing import List
 import json, pandas as pd, numpy as np
+from sklearn.decomposition import PCA
 from sklearn.preprocessing import normalize
 import hdbscan
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
@@ -23,20 +23,58 @@ from langchain_google_genai import ChatGoogleGenerativeAI  # Gemini chat
 import os
 import pandas as pd
 from typing import Optional, Dict
-from sqlalchemy import create_engine
 from sqlalchemy.dialects.postgresql import (
     BIGINT, DOUBLE_PRECISION, TEXT, BOOLEAN, JSONB, ARRAY
 )
 
+import asyncio
+import io
+import random
+import time
 import os, json
-from typing import Dict, List
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
 
+import joblib
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
 from langchain.sql_database import SQLDatabase
 from langchain.tools import Tool
 
-from config import DB_URL, MODEL_STR
+from config import (
+    DB_URL, MODEL_STR, EMBEDDING_CACHE_PATH,
+    EMBED_BATCH_SIZE, EMBED_MAX_CONCURRENCY,
+    CLUSTER_MODEL_PATH, LABEL_CHUNK_SIZE,
+    SWAP_LOCK_TIMEOUT_MS, SWAP_MAX_RETRIES,
+    HDBSCAN_REDUCE_DIM, HDBSCAN_CORE_DIST_N_JOBS,
+    HDBSCAN_PARTITIONS,
+    NAMING_MAX_CONCURRENCY, NAMING_TIMEOUT, NAMING_TOKEN_BUDGET,
+    NAMING_CLUSTERS_PER_CALL,
+    LLM_CACHE_BACKEND, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL,
+)
+from utils.clustering import (
+    apply_reducer, cluster_partitioned, fit_hdbscan, reduce_embeddings,
+    init_predict_worker, predict_block,
+)
+from utils.embedding_cache import EmbeddingCache, default_embedding_store
+from utils.engine_registry import get_engine
+from utils.async_utils import run_blocking
+from utils.embedding_scheduler import EmbeddingScheduler, is_retryable
+from utils.llm_cache import install_llm_cache
+from utils.sampling import sample_table
+from utils.table_catalog import detect_classification_columns as catalog_classification_columns
+from chatbot_service.category_catalog import ensure_category_index
+from chatbot_service.profile_store import bump_generation, refresh_profiles
+
+
+# temperature-0 prompts (cluster names, SQL, summaries) are answered once
+llm_cache = install_llm_cache(
+    LLM_CACHE_BACKEND, DB_URL, LLM_CACHE_PATH,
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=LLM_CACHE_TTL,
+)
 
 
 gemini = ChatGoogleGenerativeAI(
@@ -50,7 +88,7 @@ TABLE    = "nodes_categorized"
 CAT_COL  = "generated_category"
 
 llm      = gemini
-db       = SQLDatabase.from_uri(DB_URL)
+db       = SQLDatabase(get_engine(DB_URL))
 
 
 classification_columns: list[str] = []
@@ -59,91 +97,478 @@ classification_columns: list[str] = []
 
 def detect_classification_columns(table_name: str) -> list[str]:
     """
-    Load `table_name` into a DataFrame and return a list of columns
-    that are not IDs (col=='id' or ending '_id') and not numeric.
+    Return the non-ID, non-numeric columns of `table_name`, decided from
+    information_schema / pg_stats rather than by loading the table.
     Also updates global `classification_columns`.
     """
     global classification_columns
-    engine = create_engine(DB_URL)
-    df = pd.read_sql_table(table_name, engine)
-    cols = []
-    for col in df.columns:
-        lc = col.lower()
-        if lc == "id" or lc.endswith("_id"):
-            continue
-        if pd.api.types.is_numeric_dtype(df[col]):
-            continue
-        cols.append(col)
+    engine = get_engine(DB_URL)
+    cols = catalog_classification_columns(engine, table_name)
     classification_columns = cols
     return cols
 
 
 
-def get_records(sample_size=1000, table_name="nodes"):
-    engine = create_engine(DB_URL)
-    q = f"SELECT * FROM {table_name} LIMIT {sample_size}"
-    df = pd.read_sql(q, engine)
-    return df
+def get_records(sample_size=1000, table_name="nodes", stratify_by=None, seed=42):
+    """Seeded server-side random sample (TABLESAMPLE) instead of the first rows."""
+    engine = get_engine(DB_URL)
+    return sample_table(engine, table_name, sample_size,
+                        seed=seed, stratify_by=stratify_by)
     
 
-def cluster_hdbscan_gemini(
+# ---------------- row → text serialization ------------------------
+def _ser(v):
+    """Cell serializer: JSON strings/dicts become sorted `{k=v, …}` text."""
+    if isinstance(v, str):
+        try: v = json.loads(v)
+        except: return v
+    if isinstance(v, dict):
+        return "{" + ", ".join(
+            f"{k}={json.dumps(v[k], sort_keys=True)}" for k in sorted(v)
+        ) + "}"
+    return str(v)
+
+# json.loads only succeeds on strings starting (after JSON whitespace) with
+# one of these; everything else is returned verbatim by `_ser`.
+_JSON_START = r"[ \t\n\r]*[\[{\"\-0-9tfnNI]"
+
+def _ser_column(s: pd.Series) -> pd.Series:
+    """Columnar `_ser`: identical output, one parse per distinct value."""
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biuf":
+        return s.astype(str)                        # plain numbers/bools
+    if not isinstance(s.dtype, (np.dtype, pd.StringDtype)):
+        return s.map(_ser)                          # nullable ints etc.
+
+    out = pd.Series(np.empty(len(s), dtype=object), index=s.index)
+    is_str = (s.map(type) == str).to_numpy()
+
+    if is_str.any():
+        strs = s[is_str]
+        cand = strs.str.match(_JSON_START).to_numpy(dtype=bool)
+        vals = strs.to_numpy(dtype=object).copy()
+        if cand.any():
+            uniq = pd.unique(vals[cand])
+            parsed = dict(zip(uniq, map(_ser, uniq)))
+            vals[cand] = [parsed[v] for v in vals[cand]]
+        out[is_str] = vals
+
+    if not is_str.all():
+        out[~is_str] = [_ser(v) for v in s[~is_str]]
+    return out
+
+def serialize_rows(df: pd.DataFrame, columns: List[str]) -> List[str]:
+    """
+    Same text as `df[columns].applymap(_ser).agg(" | ".join, axis=1)`,
+    built column by column with vectorized string ops.
+    """
+    if not columns:
+        return [""] * len(df)
+    parts = [_ser_column(df[c]) for c in columns]
+    head, rest = parts[0], [p.to_numpy(dtype=object) for p in parts[1:]]
+    if not rest:
+        return head.tolist()
+    return head.str.cat(rest, sep=" | ").tolist()
+
+
+_EMBEDDING_STORE = None
+
+def _embedding_store():
+    """Process-wide embedding store (Postgres, else local file)."""
+    global _EMBEDDING_STORE
+    if _EMBEDDING_STORE is None:
+        _EMBEDDING_STORE = default_embedding_store(DB_URL, EMBEDDING_CACHE_PATH)
+    return _EMBEDDING_STORE
+
+
+def embed_rows(
     df: pd.DataFrame,
     columns: List[str],
-    min_cluster_size: int = 15,
-    min_samples: int | None = None,
-    metric: str = "euclidean",
-    model_name: str = "models/embedding-001"   # Gemini embedding model
-) -> pd.DataFrame:
-
+    model_name: str = "models/embedding-001",  # Gemini embedding model
+    use_cache: bool = True,                    # reuse stored row embeddings
+    batch_size: int = EMBED_BATCH_SIZE,        # texts per embedding request
+    max_concurrency: int = EMBED_MAX_CONCURRENCY,
+) -> np.ndarray:
+    """Serialize `columns` of every row and return L2‑normalized float32 embeddings."""
 
     # ── 1) Row‑text serialization (flatten JSON) ───────────────────────────
-    def _ser(v):
-        if isinstance(v, str):
-            try: v = json.loads(v)
-            except: return v
-        if isinstance(v, dict):
-            return "{" + ", ".join(
-                f"{k}={json.dumps(v[k], sort_keys=True)}" for k in sorted(v)
-            ) + "}"
-        return str(v)
-
-    texts = (
-        df[columns]
-        .applymap(_ser)
-        .agg(" | ".join, axis=1)
-        .tolist()
-    )
+    texts = serialize_rows(df, columns)
 
     # ── 2) Gemini embeddings  ──────────────────────────────────────────────
     embedder = GoogleGenerativeAIEmbeddings(
         model=model_name,
         task_type="retrieval_document"     # recommended for doc‑level embeddings
     )
-    embeddings = np.array(embedder.embed_documents(texts))
-    embeddings = normalize(embeddings)    # so 'euclidean' ≈ cosine
+    scheduler = EmbeddingScheduler(
+        embedder.embed_documents,
+        batch_size=batch_size,
+        max_concurrency=max_concurrency,
+    )
+    if use_cache:
+        cache = EmbeddingCache(_embedding_store(), model_name)
+        vectors = cache.embed(texts, scheduler.embed)
+        print(f"Embedding cache: {cache.hits} hits, {cache.misses} misses")
+    else:
+        vectors = scheduler.embed(texts)
+    embeddings = np.asarray(vectors, dtype=np.float32)   # half of float64
+    return normalize(embeddings, copy=False)   # so 'euclidean' ≈ cosine
 
-    # ── 3) HDBSCAN clustering ──────────────────────────────────────────────
-    clusterer = hdbscan.HDBSCAN(
-        min_cluster_size=min_cluster_size,
-        min_samples=min_samples,
-        metric=metric,
-        prediction_data=False,
-    ).fit(embeddings)
+
+def cluster_hdbscan_gemini(
+    df: pd.DataFrame,
+    columns: List[str],
+    min_cluster_size: int = 15,
+    min_samples: int | None = None,
+    metric: str = "euclidean",
+    model_name: str = "models/embedding-001",  # Gemini embedding model
+    use_cache: bool = True,                    # reuse stored row embeddings
+    batch_size: int = EMBED_BATCH_SIZE,        # texts per embedding request
+    max_concurrency: int = EMBED_MAX_CONCURRENCY,
+    reduce_dim: int = HDBSCAN_REDUCE_DIM,      # PCA dimension, 0 = full vectors
+    core_dist_n_jobs: int = HDBSCAN_CORE_DIST_N_JOBS,
+    n_partitions: int = HDBSCAN_PARTITIONS,    # > 1: see `cluster_partitioned`
+) -> pd.DataFrame:
+
+    # ── 1+2) Serialize rows & embed ────────────────────────────────────────
+    embeddings = embed_rows(
+        df, columns, model_name,
+        use_cache=use_cache,
+        batch_size=batch_size,
+        max_concurrency=max_concurrency,
+    )
+
+    # ── 3) Optional PCA (float32) & HDBSCAN clustering ─────────────────────
+    reduced, _ = reduce_embeddings(embeddings, reduce_dim)
+    if n_partitions > 1:
+        labels = cluster_partitioned(
+            reduced,
+            n_partitions,
+            min_cluster_size=min_cluster_size,
+            min_samples=min_samples,
+            metric=metric,
+        )
+    else:
+        labels = fit_hdbscan(
+            reduced,
+            min_cluster_size=min_cluster_size,
+            min_samples=min_samples,
+            metric=metric,
+            core_dist_n_jobs=core_dist_n_jobs,
+        ).labels_
 
     # ── 4) Attach labels & return ──────────────────────────────────────────
     df_out = df.copy()
-    df_out["cluster_label"] = clusterer.labels_   # ‑1 = noise
+    df_out["cluster_label"] = labels   # ‑1 = noise
     return df_out
 
+
+# ---------------- fit on sample → propagate to full table ----------
+def save_cluster_model(
+    path: str,
+    clusterer: hdbscan.HDBSCAN,
+    columns: List[str],
+    model_name: str,
+    names: Dict[int, str],
+    reducer: PCA | None = None,
+) -> None:
+    """
+    Persist a fitted clusterer with everything needed to label new rows,
+    including the projection it was fitted in (`reduce_embeddings`).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(
+        {"clusterer": clusterer, "columns": columns,
+         "model_name": model_name, "names": names, "reducer": reducer},
+        path,
+    )
+
+
+def load_cluster_model(path: str = CLUSTER_MODEL_PATH) -> Dict[str, Any]:
+    return joblib.load(path)
+
+
+def iter_records(table_name: str = "nodes", chunksize: int = LABEL_CHUNK_SIZE):
+    """Stream `table_name` in DataFrame chunks through a server‑side cursor."""
+    engine = get_engine(DB_URL)
+    with engine.connect().execution_options(stream_results=True) as conn:
+        yield from pd.read_sql(text(f"SELECT * FROM {table_name}"), conn, chunksize=chunksize)
+
+
+def label_rows(
+    df: pd.DataFrame,
+    model: Dict[str, Any],
+    pool: ProcessPoolExecutor | None = None,
+    n_blocks: int = 1,
+) -> pd.DataFrame:
+    """
+    Label rows with a persisted clusterer (no refit): embed, then
+    `approximate_predict`, split over `pool` when one is given.
+    """
+    embeddings = embed_rows(df, model["columns"], model["model_name"])
+    embeddings = apply_reducer(model.get("reducer"), embeddings)
+    if pool is None:
+        labels, _ = hdbscan.approximate_predict(model["clusterer"], embeddings)
+    else:
+        blocks = [b for b in np.array_split(embeddings, n_blocks) if len(b)]
+        labels = np.concatenate(list(pool.map(predict_block, blocks)))
+
+    df_out = df.copy()
+    df_out["cluster_label"] = labels
+    df_out["generated_category"] = (
+        df_out["cluster_label"].map(model["names"]).fillna("unknown")
+    )
+    return df_out
+
+
+def _report(progress: Callable[..., None] | None, stage: str, **counters) -> None:
+    if progress is not None:
+        progress(stage, **counters)
+
+
+def write_labelled(
+    chunks: Iterable[pd.DataFrame],
+    out_table: str = "nodes_categorized",
+    write_mode: str = "rebuild",
+    progress: Callable[..., None] | None = None,
+) -> int:
+    """
+    Write labelled chunks to `out_table`: "rebuild" fills `<out_table>__new`
+    and swaps it in at the end; "upsert" updates `out_table` in place,
+    touching only rows whose label changed.  `progress("write",
+    rows_written=…)` is called after every chunk.  Returns the row count.
+    """
+    staging = out_table + _STAGING_SUFFIX
+    written = 0
+    for i, chunk in enumerate(chunks):
+        if write_mode == "upsert":
+            write_df_to_postgres(chunk, table_name=out_table, if_exists="upsert")
+        else:
+            write_df_to_postgres(
+                chunk,
+                table_name=staging,
+                if_exists="replace" if i == 0 else "append",
+            )
+        written += len(chunk)
+        _report(progress, "write", rows_written=written)
+    engine = get_engine(DB_URL)
+    if write_mode == "rebuild" and written:
+        # index the staging table so the swapped-in table is ready at once
+        ensure_category_index(engine, staging)
+        swap_tables(engine, staging, out_table)
+    elif written:
+        ensure_category_index(engine, out_table)
+    return written
+
+
+def propagate_labels(
+    table_name: str = "nodes",
+    out_table: str = "nodes_categorized",
+    model_path: str = CLUSTER_MODEL_PATH,
+    chunksize: int = LABEL_CHUNK_SIZE,
+    n_workers: int | None = None,
+    write_mode: str = "rebuild",
+    progress: Callable[..., None] | None = None,
+) -> int:
+    """
+    Label every row of `table_name` with the clusterer saved at
+    `model_path` and write the result to `out_table` chunk by chunk (see
+    `write_labelled` for `write_mode`).  `progress("embed",
+    rows_embedded=…)` and `progress("write", rows_written=…)` are called
+    for every chunk.  Returns the number of rows processed.
+    """
+    if write_mode not in ("rebuild", "upsert"):
+        raise ValueError(f"Unknown write_mode: {write_mode}")
+    model = load_cluster_model(model_path)
+    n_workers = n_workers or os.cpu_count() or 1
+
+    def labelled(pool):
+        embedded = 0
+        for chunk in iter_records(table_name, chunksize):
+            out = label_rows(chunk, model, pool=pool, n_blocks=n_workers)
+            embedded += len(out)
+            _report(progress, "embed", rows_embedded=embedded)
+            yield out
+
+    # spawn, not fork: this process holds gRPC and DB threads; workers only
+    # import utils.clustering
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_predict_worker,
+        initargs=(model_path,),
+    ) as pool:
+        return write_labelled(labelled(pool), out_table, write_mode, progress)
+
 # ---------------- helper to stringify selected cols ----------------
-def _row_text(row: pd.Series, cols: List[str]) -> str:
+def _rows_text(df: pd.DataFrame, cols: List[str]) -> pd.Series:
+    """`c1=v1 | c2=v2 …` per row (dicts as sorted JSON), built per column."""
     parts = []
     for c in cols:
-        val = row[c]
-        if isinstance(val, dict):
-            val = json.dumps(val, sort_keys=True)
-        parts.append(f"{c}={val}")
-    return " | ".join(parts)
+        s = df[c]
+        if s.dtype == object:
+            s = s.map(lambda v: json.dumps(v, sort_keys=True) if isinstance(v, dict) else str(v))
+        else:
+            s = s.astype(str)
+        parts.append(c + "=" + s)
+    if not parts:
+        return pd.Series("", index=df.index)
+    return parts[0].str.cat([p.to_numpy(dtype=object) for p in parts[1:]], sep=" | ")
+
+def _select_exemplars(
+    positions: np.ndarray,
+    embeddings: np.ndarray | None,
+    k: int,
+) -> np.ndarray:
+    """
+    The k rows nearest the cluster centroid, nearest first.  Embeddings are
+    unit length, so the highest dot product with the centroid is the
+    smallest euclidean distance to it.  Without embeddings: first k rows.
+    """
+    if embeddings is None or len(positions) <= 1:
+        return positions[:k]
+    vecs = embeddings[positions]
+    sims = vecs @ vecs.mean(axis=0)
+    k = min(k, len(positions))
+    top = np.argpartition(-sims, k - 1)[:k]
+    return positions[top[np.argsort(-sims[top], kind="stable")]]
+
+def _within_budget(lines: List[str], token_budget: int) -> List[str]:
+    """Keep leading lines while they fit ~`token_budget` tokens (≈4 chars each)."""
+    kept, used = [], 0
+    for line in lines:
+        used += len(line) + 1
+        if kept and used > token_budget * 4:
+            break
+        kept.append(line)
+    return kept
+
+def _naming_prompt(examples: str) -> str:
+    return f"""
+You are assigned to invent a concise, human‑readable category name
+for a cluster of data records.  Below are example rows from one cluster;
+each line shows selected fields in "key=value" format.
+
+Example rows:
+{examples}
+
+Provide ONE short category name (2–4 words max) that describes these rows.
+Reply with ONLY the name, no bullet points, no extra text.
+"""
+
+def _batch_naming_prompt(examples: Dict[int, str]) -> str:
+    blocks = "\n\n".join(
+        f"Cluster {label} example rows:\n{rows}" for label, rows in examples.items()
+    )
+    return f"""
+You are assigned to invent concise, human‑readable category names for
+several clusters of data records.  Below are example rows for each cluster;
+each line shows selected fields in "key=value" format.
+
+{blocks}
+
+For EVERY cluster provide ONE short category name (2–4 words max).
+Reply with ONLY a JSON object mapping cluster id to name, e.g.
+{{"{next(iter(examples))}": "Park benches"}}
+"""
+
+def _clean_name(raw: str) -> str:
+    return raw.strip().strip('"').strip("'")
+
+def _parse_batch_names(raw: str, labels: List[int]) -> Dict[int, str]:
+    """Names for whichever of `labels` the JSON reply covers."""
+    body = raw[raw.find("{"):raw.rfind("}") + 1]
+    try:
+        obj = json.loads(body)
+    except ValueError:
+        return {}
+    if not isinstance(obj, dict):
+        return {}
+    by_key = {str(k).strip(): v for k, v in obj.items()}
+    names = {}
+    for label in labels:
+        name = by_key.get(str(label))
+        if isinstance(name, str) and _clean_name(name):
+            names[label] = _clean_name(name)
+    return names
+
+
+async def _apredict_many(
+    llm,
+    prompts: Dict[Any, str],
+    max_concurrency: int,
+    timeout: float,
+    max_retries: int,
+) -> Dict[Any, str | None]:
+    """
+    Run `llm.predict` over `prompts` concurrently.  Each call gets `timeout`
+    seconds and is retried on timeouts and 429/5xx; a prompt that still
+    fails maps to None instead of aborting the run.
+    """
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(max_concurrency)
+    # abandoned (timed-out) calls keep their thread, so size for the worst case
+    pool = ThreadPoolExecutor(max_workers=max_concurrency * (max_retries + 1))
+
+    async def _one(key, prompt: str):
+        async with sem:
+            for attempt in range(max_retries + 1):
+                try:
+                    raw = await asyncio.wait_for(
+                        loop.run_in_executor(pool, llm.predict, prompt), timeout
+                    )
+                    return key, raw
+                except asyncio.TimeoutError:
+                    reason = f"timed out after {timeout}s"
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    reason = str(e)
+                if attempt < max_retries:
+                    await asyncio.sleep(min(30.0, 2 ** attempt))
+            print(f"⚠️  LLM call for {key} failed ({reason})")
+            return key, None
+
+    try:
+        pairs = await asyncio.gather(*(_one(k, p) for k, p in prompts.items()))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return dict(pairs)
+
+
+async def _aname_clusters(
+    llm,
+    examples: Dict[int, str],
+    clusters_per_call: int,
+    max_concurrency: int,
+    timeout: float,
+    max_retries: int,
+) -> Dict[int, str]:
+    """
+    Name clusters, packing `clusters_per_call` of them into one JSON-reply
+    prompt when > 1.  Labels missing from a batched reply are retried with
+    one call each; a cluster whose call fails is named "unknown".
+    """
+    names: Dict[int, str] = {}
+    labels = list(examples)
+
+    if clusters_per_call > 1:
+        groups = [labels[i:i + clusters_per_call]
+                  for i in range(0, len(labels), clusters_per_call)]
+        raws = await _apredict_many(
+            llm,
+            {f"clusters {g[0]}…{g[-1]}": _batch_naming_prompt({l: examples[l] for l in g})
+             for g in groups},
+            max_concurrency, timeout, max_retries,
+        )
+        for g, raw in zip(groups, raws.values()):
+            names.update(_parse_batch_names(raw or "", g))
+
+    rest = {l: _naming_prompt(examples[l]) for l in labels if l not in names}
+    if rest:
+        raws = await _apredict_many(llm, rest, max_concurrency, timeout, max_retries)
+        for label, raw in raws.items():
+            names[label] = _clean_name(raw or "") or "unknown"
+    return names
+
 
 # ---------------- main routine -------------------------------------
 def name_clusters_via_llm(
@@ -152,43 +577,51 @@ def name_clusters_via_llm(
     text_cols: List[str],
     llm=None,
     sample_per_cluster: int = 1_000,
+    embeddings: np.ndarray | None = None,      # row‑aligned, L2‑normalized
+    token_budget: int = NAMING_TOKEN_BUDGET,   # per‑cluster exemplar budget
+    clusters_per_call: int = NAMING_CLUSTERS_PER_CALL,
+    max_concurrency: int = NAMING_MAX_CONCURRENCY,
+    timeout: float = NAMING_TIMEOUT,
+    max_retries: int = 2,
 ) -> tuple[pd.DataFrame, Dict[int, str]]:
     """
     Adds a 'generated_category' column by LLM‑naming each cluster.
+    Exemplars are the `sample_per_cluster` rows nearest each cluster's
+    centroid in `embeddings` (first rows when not given), trimmed to
+    `token_budget`.  With `clusters_per_call` > 1 several clusters share
+    one prompt that asks for a JSON {label: name} reply; labels it misses
+    fall back to single-cluster calls.  Up to `max_concurrency` calls run
+    at once; the mapping does not depend on completion order.
 
     Returns
     -------
     df_out : DataFrame   (copy with new column)
     mapping : {cluster_label: generated_name}
     """
-    llm = gemini
+    llm = llm or gemini
     mapping: Dict[int, str] = {}
-
-    for label, sub in df.groupby(cluster_col):
+    chosen: Dict[int, np.ndarray] = {}
+    for label, positions in df.groupby(cluster_col).indices.items():
         if label == -1:               # treat noise separately
             mapping[label] = "noise"
             continue
+        # up to N rows closest to the cluster centroid
+        chosen[label] = _select_exemplars(positions, embeddings, sample_per_cluster)
 
-        # take up to N rows for prompt
-        sub_sample = sub.head(sample_per_cluster)
-
-        examples = "\n".join(
-            _row_text(r, text_cols) for _, r in sub_sample.iterrows()
-        )
-
-        prompt = f"""
-You are assigned to invent a concise, human‑readable category name
-for a cluster of data records.  Below are example rows from one cluster;
-each line shows selected fields in "key=value" format.
-
-Example rows:
-{examples}
+    examples: Dict[int, str] = {}
+    if chosen:
+        order = np.concatenate(list(chosen.values()))
+        lines = _rows_text(df.iloc[order], text_cols).tolist()
+        start = 0
+        for label, positions in chosen.items():
+            rows = lines[start:start + len(positions)]
+            start += len(positions)
+            examples[label] = "\n".join(_within_budget(rows, token_budget))
 
-Provide ONE short category name (2–4 words max) that describes these rows.
-Reply with ONLY the name, no bullet points, no extra text.
-"""
-        category = llm.predict(prompt).strip().strip('"').strip("'")
-        mapping[label] = category or "unknown"
+    mapping.update(run_blocking(lambda: _aname_clusters(
+        llm, examples, clusters_per_call, max_concurrency, timeout, max_retries
+    )))
+    mapping = dict(sorted(mapping.items()))
 
     # attach back
     df_out = df.copy()
@@ -254,6 +687,211 @@ def _infer_pg_dtype(series: pd.Series):
     return TEXT  # fallback
 
 
+# ─────────────────────────────────────────────────────────
+# COPY helpers
+# ─────────────────────────────────────────────────────────
+_COPY_NULL = "\\N"
+# COPY text format: backslash, tab and newlines inside a value are escaped,
+# so no data cell can ever read back as the unescaped NULL marker
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def _is_null(v) -> bool:
+    return v is None or (isinstance(v, float) and np.isnan(v))
+
+def _copy_cell(v) -> str:
+    if _is_null(v) or v is pd.NA or v is pd.NaT:
+        return _COPY_NULL
+    if isinstance(v, (bool, np.bool_)):
+        return "t" if v else "f"
+    return str(v).translate(_COPY_ESCAPES)
+
+def _pg_array_literal(v) -> str | None:
+    """Python list → Postgres TEXT[] literal, e.g. ['a', None] → {"a",NULL}."""
+    if _is_null(v):
+        return None
+    items = []
+    for x in v:
+        if _is_null(x):
+            items.append("NULL")
+        else:
+            items.append('"' + str(x).replace("\\", "\\\\").replace('"', '\\"') + '"')
+    return "{" + ",".join(items) + "}"
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _copy_frame(chunk: pd.DataFrame, dtype_map: Dict[str, Any]) -> pd.DataFrame:
+    """Render JSONB/ARRAY columns as COPY‑ready text; others pass through."""
+    out = chunk.copy()
+    for col, typ in dtype_map.items():
+        if typ is JSONB:
+            out[col] = chunk[col].map(lambda v: None if _is_null(v) else json.dumps(v))
+        elif isinstance(typ, ARRAY):
+            out[col] = chunk[col].map(_pg_array_literal)
+    return out
+
+def _copy_text(chunk: pd.DataFrame, dtype_map: Dict[str, Any]) -> str:
+    """One COPY text-format payload (tab-separated, escaped, NULL as \\N)."""
+    frame = _copy_frame(chunk, dtype_map)
+    cols = []
+    for col in frame.columns:
+        s = frame[col]
+        if s.dtype.kind in "iuf":            # numbers need no escaping
+            cols.append(s.astype(str).mask(s.isna(), _COPY_NULL))
+        else:
+            cols.append(s.map(_copy_cell))
+    if not cols:
+        return ""
+    lines = cols[0].str.cat(cols[1:], sep="\t") if len(cols) > 1 else cols[0]
+    return "\n".join(lines) + "\n"
+
+def _qualified(table_name: str, schema: Optional[str]) -> str:
+    return (_quote_ident(schema) + "." if schema else "") + _quote_ident(table_name)
+
+def _copy_rows(
+    cur,
+    target: str,
+    df: pd.DataFrame,
+    dtype_map: Dict[str, Any],
+    chunksize: int,
+) -> None:
+    """Stream `df` into the (quoted) `target` via COPY, one text chunk at a time."""
+    cols = ", ".join(_quote_ident(c) for c in df.columns)
+    copy_sql = f"COPY {target} ({cols}) FROM STDIN"      # text format, NULL \\N
+    for start in range(0, len(df), chunksize):
+        buf = io.StringIO(_copy_text(df.iloc[start:start + chunksize], dtype_map))
+        cur.copy_expert(copy_sql, buf)
+
+def _copy_df(
+    df: pd.DataFrame,
+    table_name: str,
+    engine,
+    schema: Optional[str],
+    if_exists: str,
+    dtype_map: Dict[str, Any],
+    chunksize: int,
+) -> None:
+    """
+    Create/replace the table and stream `df` through `COPY FROM STDIN`
+    inside a single transaction.  With "replace" the DROP TABLE takes an
+    ACCESS EXCLUSIVE lock, so readers block until the load commits; use
+    `if_exists="swap"` to keep the old table readable meanwhile.
+    """
+    with engine.begin() as conn:
+        # DDL (incl. DROP for "replace") from pandas, same types as to_sql
+        df.head(0).to_sql(
+            name=table_name, con=conn, schema=schema,
+            if_exists=if_exists, index=False, dtype=dtype_map,
+        )
+        cur = conn.connection.cursor()
+        _copy_rows(cur, _qualified(table_name, schema), df, dtype_map, chunksize)
+        cur.close()
+
+def _table_exists(engine, table_name: str, schema: Optional[str]) -> bool:
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT to_regclass(:t) IS NOT NULL"),
+            {"t": _qualified(table_name, schema)},
+        ).scalar()
+
+def _upsert_df(
+    df: pd.DataFrame,
+    table_name: str,
+    engine,
+    schema: Optional[str],
+    dtype_map: Dict[str, Any],
+    chunksize: int,
+    key: str,
+    change_cols: List[str],
+) -> int:
+    """
+    COPY `df` into a temp staging table, then
+    `INSERT … ON CONFLICT (key) DO UPDATE` only rows whose `change_cols`
+    differ.  Row locks only, so readers never wait or see an empty table.
+    Returns the number of rows inserted or updated.
+    """
+    target = _qualified(table_name, schema)
+    cols = list(df.columns)
+    col_list = ", ".join(_quote_ident(c) for c in cols)
+    updates = ", ".join(
+        f"{_quote_ident(c)} = EXCLUDED.{_quote_ident(c)}" for c in cols if c != key
+    )
+    changed = " OR ".join(
+        f"t.{_quote_ident(c)} IS DISTINCT FROM EXCLUDED.{_quote_ident(c)}"
+        for c in change_cols
+    ) or "TRUE"
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {_quote_ident(table_name + '_' + key + '_key')} "
+            f"ON {target} ({_quote_ident(key)})"
+        ))
+        conn.execute(text(
+            f"CREATE TEMP TABLE _stage (LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP"
+        ))
+        cur = conn.connection.cursor()
+        _copy_rows(cur, "_stage", df, dtype_map, chunksize)
+        cur.close()
+        res = conn.execute(text(
+            f"INSERT INTO {target} AS t ({col_list}) "
+            f"SELECT {col_list} FROM _stage "
+            f"ON CONFLICT ({_quote_ident(key)}) DO UPDATE SET {updates} "
+            f"WHERE {changed}"
+        ))
+        return res.rowcount
+
+_STAGING_SUFFIX = "__new"     # `<table>__new` is built on the side, then swapped in
+
+def swap_tables(
+    engine,
+    staging: str,
+    table_name: str,
+    schema: Optional[str] = None,
+    lock_timeout_ms: int = SWAP_LOCK_TIMEOUT_MS,
+    max_retries: int = SWAP_MAX_RETRIES,
+) -> None:
+    """
+    Atomically replace `table_name` with the fully built `staging` table.
+    The renames wait at most `lock_timeout_ms` for the ACCESS EXCLUSIVE
+    lock, so a long reader never queues every later query behind them;
+    on timeout the swap is retried with jittered exponential back-off.
+    """
+    old = table_name + "__old"
+    for attempt in range(max_retries + 1):
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+                conn.execute(text(f"DROP TABLE IF EXISTS {_qualified(old, schema)}"))
+                conn.execute(text(
+                    f"ALTER TABLE IF EXISTS {_qualified(table_name, schema)} "
+                    f"RENAME TO {_quote_ident(old)}"
+                ))
+                conn.execute(text(
+                    f"ALTER TABLE {_qualified(staging, schema)} RENAME TO {_quote_ident(table_name)}"
+                ))
+                conn.execute(text(f"DROP TABLE IF EXISTS {_qualified(old, schema)}"))
+                # indexes built on the staging table follow it under the live name
+                for (index,) in conn.execute(
+                    text(
+                        "SELECT indexname FROM pg_indexes "
+                        "WHERE schemaname = coalesce(:s, current_schema()) "
+                        "AND tablename = :t AND indexname LIKE :p"
+                    ),
+                    {"s": schema, "t": table_name,
+                     "p": staging.replace("_", r"\_") + r"\_%"},
+                ).all():
+                    conn.execute(text(
+                        f"ALTER INDEX {_qualified(index, schema)} RENAME TO "
+                        f"{_quote_ident(table_name + index[len(staging):])}"
+                    ))
+            break
+        except OperationalError as e:
+            if getattr(e.orig, "pgcode", None) != "55P03" or attempt == max_retries:
+                raise                               # not lock_not_available
+            time.sleep(min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0))
+    bump_generation(engine, f"{schema+'.' if schema else ''}{table_name}")
+
+
 # ─────────────────────────────────────────────────────────
 # main writer
 # ─────────────────────────────────────────────────────────
@@ -262,15 +900,61 @@ def write_df_to_postgres(
     table_name: str,
     db_url: str = DB_URL,
     schema: Optional[str] = None,
-    if_exists: str = "replace",   # "append" or "replace"
-    chunksize: int = 10_000
+    if_exists: str = "replace",   # "append", "replace", "upsert" or "swap"
+    chunksize: int = 10_000,
+    method: str = "copy",         # "copy" (COPY FROM STDIN) or "to_sql"
+    key: str = "id",              # conflict key for "upsert"
+    change_cols: Optional[List[str]] = None,
 ) -> None:
-    engine = create_engine(db_url)
+    """
+    if_exists
+    ---------
+    replace : drop & recreate in one transaction (blocks readers meanwhile)
+    append  : add rows
+    upsert  : stage, then update/insert only rows whose `change_cols`
+              (default: cluster_label / generated_category) changed
+    swap    : build `<table>__new` on the side, then rename it into place
+    """
+    engine = get_engine(db_url)
 
     # Build dtype mapping
     dtype_map: Dict[str, Any] = {
         col: _infer_pg_dtype(df[col]) for col in df.columns
     }
+    where = f"{schema+'.' if schema else ''}{table_name}"
+    # staging tables are invisible until swap_tables renames them, which
+    # bumps the live name; versioning them only leaves orphan rows
+    versioned = not table_name.endswith(_STAGING_SUFFIX)
+
+    if if_exists == "upsert" and _table_exists(engine, table_name, schema):
+        if change_cols is None:
+            change_cols = [c for c in ("cluster_label", "generated_category")
+                           if c in df.columns] or [c for c in df.columns if c != key]
+        n = _upsert_df(df, table_name, engine, schema, dtype_map,
+                       chunksize, key, change_cols)
+        if n:
+            bump_generation(engine, where)
+        print(f"✅  Upserted {n} changed rows of {len(df)} → {where}")
+        return
+    if if_exists == "upsert":
+        if_exists = "replace"                   # first run: plain create
+
+    if if_exists == "swap":
+        staging = table_name + _STAGING_SUFFIX
+        write_df_to_postgres(df, staging, db_url, schema, "replace", chunksize, method)
+        swap_tables(engine, staging, table_name, schema)
+        print(f"✅  Swapped {staging} → {where}")
+        return
+
+    if method == "copy":
+        try:
+            _copy_df(df, table_name, engine, schema, if_exists, dtype_map, chunksize)
+            if versioned:
+                bump_generation(engine, where)
+            print(f"✅  Wrote {len(df)} rows → {where} (COPY)")
+            return
+        except Exception as e:
+            print(f"⚠️  COPY failed, falling back to to_sql: {e}")
 
     df.to_sql(
         name=table_name,
@@ -282,11 +966,33 @@ def write_df_to_postgres(
         method="multi",
         chunksize=chunksize
     )
-    print(f"✅  Wrote {len(df)} rows → {schema+'.' if schema else ''}{table_name}")
+    if versioned:
+        bump_generation(engine, where)
+    print(f"✅  Wrote {len(df)} rows → {where}")
+
 
 
+def trigger_explore(
+    mode: str = "sample",
+    write_mode: str = "rebuild",
+    progress: Callable[..., None] | None = None,
+):
+    """
+    mode="sample"    – cluster, name and write the first `sample_size` rows.
+    mode="propagate" – fit on the sample, persist the clusterer, then label
+                       the whole `nodes` table chunk by chunk.
+
+    write_mode="rebuild" builds the new table on the side and swaps it in;
+    "upsert" only rewrites rows whose cluster/category changed.
 
-def trigger_explore():
+    progress(stage, **counters), when given, is called as each stage
+    advances (detect, embed, cluster, name, write, profile); the job runner
+    (utils/job_runner.py) uses it for status and to stop a cancelled run.
+    """
+    if mode not in ("sample", "propagate"):
+        raise ValueError(f"Unknown mode: {mode}")
+    if write_mode not in ("rebuild", "upsert"):
+        raise ValueError(f"Unknown write_mode: {write_mode}")
     detect_tool = Tool(
         name="detect_classification_columns",
         func=detect_classification_columns,
@@ -310,25 +1016,65 @@ def trigger_explore():
     )
     
     table_name = "nodes"
+    _report(progress, "detect", table=table_name)
     response = agent.invoke({"messages": [{"role": "user", "content": table_name}]})
     print("Detected classification columns:", classification_columns)
     sample_size = 1000
     
     df = get_records(sample_size=sample_size)
-    clustered = cluster_hdbscan_gemini(
-        df,
-        columns=classification_columns,      # columns to embed
-        min_cluster_size=20
-    )
+    model_name = "models/embedding-001"
+    _report(progress, "detect", columns=list(classification_columns))
+    embeddings = embed_rows(df, classification_columns, model_name)
+    _report(progress, "embed", rows_embedded=len(df))
+    reduced, reducer = reduce_embeddings(embeddings)
+    if mode == "sample" and HDBSCAN_PARTITIONS > 1:
+        # propagate needs one model for approximate_predict, so only the
+        # sample-only path can be fitted per shard
+        clusterer = None
+        labels = cluster_partitioned(reduced, HDBSCAN_PARTITIONS, min_cluster_size=20)
+    else:
+        clusterer = fit_hdbscan(
+            reduced,
+            min_cluster_size=20,
+            prediction_data=(mode == "propagate"),
+        )
+        labels = clusterer.labels_
+    _report(progress, "cluster", clusters=int(labels.max()) + 1,
+            noise_rows=int((labels == -1).sum()))
+    clustered = df.copy()
+    clustered["cluster_label"] = labels
     
     df_named, cluster_to_name = name_clusters_via_llm(
         clustered,
         cluster_col="cluster_label",
         text_cols=classification_columns,       # columns you clustered on
-        sample_per_cluster=1000           # cap rows per cluster sent to LLM
+        sample_per_cluster=25,            # centroid-nearest rows per prompt
+        embeddings=embeddings,
     )
+    _report(progress, "name", clusters_named=len(cluster_to_name))
     new_table_name = "nodes_categorized"
 
-    write_df_to_postgres(df_named, table_name=new_table_name)
+    if mode == "sample":
+        write_labelled(
+            (df_named.iloc[i:i + LABEL_CHUNK_SIZE]
+             for i in range(0, len(df_named), LABEL_CHUNK_SIZE)),
+            new_table_name, write_mode, progress,
+        )
+        n = refresh_profiles(get_engine(DB_URL), new_table_name, gemini)
+        print(f"✅  Profiled {n} categories of {new_table_name}")
+        _report(progress, "profile", categories_profiled=n)
+        return {"rows": len(df_named), "clusters": len(cluster_to_name), "categories": n}
+
+    save_cluster_model(
+        CLUSTER_MODEL_PATH, clusterer,
+        classification_columns, model_name, cluster_to_name, reducer,
+    )
+    rows = propagate_labels(table_name, out_table=new_table_name,
+                            write_mode=write_mode, progress=progress)
+    print(f"✅  Labelled {rows} rows of {table_name} with the sample clusterer")
+    n = refresh_profiles(get_engine(DB_URL), new_table_name, gemini)
+    print(f"✅  Profiled {n} categories of {new_table_name}")
+    _report(progress, "profile", categories_profiled=n)
+    return {"rows": rows, "clusters": len(cluster_to_name), "categories": n}
     
     
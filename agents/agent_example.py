@@ -44,7 +44,7 @@ class ExampleAgent(BaseAgent):
 
         return [hello_tool, answer_tool]
 
-    def llm(self, query):
+    def llm(self, query, stream_mode="values"):
         if not self.api_key:
             logger.error("Cannot run ExampleAgent: OPENAI_API_KEY not set")
             raise ValueError("OPENAI_API_KEY environment variable is not set")
@@ -69,7 +69,7 @@ class ExampleAgent(BaseAgent):
             return agent_executor.stream(
                 {"messages": [system_message, HumanMessage(content=query)]},
                 config,
-                stream_mode="values",
+                stream_mode=stream_mode,
             )
         except Exception as e:
             logger.error(f"Error in ExampleAgent.llm: {str(e)}")
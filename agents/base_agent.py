@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
 
 class BaseAgent(ABC):
     def __init__(self) -> None:
@@ -18,19 +20,53 @@ class BaseAgent(ABC):
         return []
 
     @abstractmethod
-    def llm(self, query):
+    def llm(self, query, stream_mode="values"):
         """
         Process a query using this agent's LLM.
         This method should be implemented by subclasses.
 
         Args:
             query: The user's query as a string
+            stream_mode: LangGraph stream mode(s) passed to `stream(...)`
 
         Returns:
             The response from the LLM
         """
         pass
 
+    def llm_events(self, query):
+        """
+        Stream a query as events while the agent runs: "token" for each
+        piece of model output, "tool_call"/"tool_result" for each agent
+        step and a final "done" with the complete answer.
+
+        Args:
+            query: The user's query as a string
+
+        Yields:
+            Event dicts with a "type" key
+        """
+        answer = ""
+        for mode, data in self.llm(query, stream_mode=["messages", "updates"]):
+            if mode == "messages":
+                chunk, _ = data
+                if isinstance(chunk, AIMessageChunk) and isinstance(chunk.content, str) \
+                        and chunk.content:
+                    yield {"type": "token", "content": chunk.content}
+                continue
+            for update in data.values():
+                for message in (update or {}).get("messages", []):
+                    if isinstance(message, ToolMessage):
+                        yield {"type": "tool_result", "tool": message.name,
+                               "output": str(message.content)}
+                    elif isinstance(message, AIMessage):
+                        for call in message.tool_calls:
+                            yield {"type": "tool_call", "tool": call["name"],
+                                   "input": call["args"]}
+                        if not message.tool_calls:
+                            answer = message.content
+        yield {"type": "done", "answer": answer}
+
     def llm_run(self, query):
         """
         Run the LLM agent and print each step's messages.
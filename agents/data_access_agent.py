@@ -1,13 +1,15 @@
 import os
 import logging
-from typing import List
+from typing import List, Optional
 import pandas as pd
-from sqlalchemy import create_engine
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.tools import Tool
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
+from utils.engine_registry import get_engine
+from utils.sampling import sample_table
+from utils.table_catalog import detect_classification_columns as catalog_classification_columns
 from .base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
@@ -29,42 +31,42 @@ classification_columns: List[str] = []
 # 4. Detection logic: read table, return column names
 def detect_classification_columns(table_name: str) -> List[str]:
     """
-    Load `table_name` into a DataFrame and return a list of columns
-    that are not IDs (col=='id' or ending '_id') and not numeric.
+    Return the non-ID, non-numeric columns of `table_name`, decided from
+    information_schema / pg_stats rather than by loading the table.
     Also updates global `classification_columns`.
     """
     global classification_columns
-    engine = create_engine(DB_URL)
-    df = pd.read_sql_table(table_name, engine)
-    cols = []
-    for col in df.columns:
-        lc = col.lower()
-        if lc == "id" or lc.endswith("_id"):
-            continue
-        if pd.api.types.is_numeric_dtype(df[col]):
-            continue
-        cols.append(col)
+    engine = get_engine(DB_URL)
+    cols = catalog_classification_columns(engine, table_name)
     classification_columns = cols
     return cols
 
 
-def get_records(table_name: str, sample_size: int = 1000) -> pd.DataFrame:
+def get_records(
+    table_name: str,
+    sample_size: int = 1000,
+    stratify_by: Optional[str] = None,
+) -> pd.DataFrame:
     """
-    Load `table_name` into a DataFrame and return a sample of the records.
+    Return a random sample of `table_name`, drawn inside Postgres with
+    TABLESAMPLE so the table is never loaded in full.
 
     Args:
-        table_name (str): The name of the table to load.
-        sample_size (int, optional): The maximum number of rows to sample. Defaults to 1000.
+        table_name (str): The name of the table to sample.
+        sample_size (int, optional): The approximate number of rows to sample. Defaults to 1000.
+        stratify_by (str, optional): Column (e.g. `generated_category`) whose values
+            should each be represented proportionally.
 
     Returns:
         pd.DataFrame: A DataFrame containing the sampled records.  If the table
                       has fewer than `sample_size` rows, all rows are returned.
     """
-    engine = create_engine(DB_URL)
-    df = pd.read_sql_table(table_name, engine)
-    if len(df) > sample_size:
-        return df.sample(sample_size, random_state=42)  # Consistent sampling
-    return df
+    engine = get_engine(DB_URL)
+    return sample_table(
+        engine, table_name, sample_size,
+        seed=42,  # Consistent sampling
+        stratify_by=stratify_by,
+    )
 
 
 class DataAccessAgent(BaseAgent):
@@ -86,8 +88,12 @@ class DataAccessAgent(BaseAgent):
         return detect_classification_columns(table_name)
 
     def _get_table_records(self, table_name: str, sample_size: int = 1000) -> str:
-        """Tool function to get records from a table."""
-        df = get_records(table_name, sample_size)
+        """
+        Tool function to get a random sample of records from a table.
+        `table_name:column` stratifies the sample by that column.
+        """
+        table_name, _, stratify_by = table_name.partition(":")
+        df = get_records(table_name.strip(), sample_size, stratify_by.strip() or None)
         return df.to_string()  # Convert to string for LLM consumption
 
     def get_tools(self):
@@ -106,7 +112,10 @@ class DataAccessAgent(BaseAgent):
 
         get_records_tool = Tool(
             name="GetTableRecords",
-            description="Get records from a table.",
+            description=(
+                "Get a random sample of records from a table. Pass `table` or "
+                "`table:column` to sample every value of `column` proportionally."
+            ),
             func=self._get_table_records,
         )
 
@@ -115,7 +124,7 @@ class DataAccessAgent(BaseAgent):
         )  # Add new tools
         return tools
 
-    def llm(self, query):
+    def llm(self, query, stream_mode="values"):
         if not self.api_key:
             logger.error("Cannot run DataAccessAgent: GOOGLE_API_KEY not set")
             raise ValueError("GOOGLE_API_KEY environment variable is not set")
@@ -141,7 +150,7 @@ class DataAccessAgent(BaseAgent):
             return agent_executor.stream(
                 {"messages": [system_message, HumanMessage(content=query)]},
                 config,
-                stream_mode="values",
+                stream_mode=stream_mode,
             )
         except Exception as e:
             logger.error(f"Error in DataAccessAgent.llm: {str(e)}")
@@ -5,30 +5,63 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 import uvicorn
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Any, Dict
-from sqlalchemy import create_engine, text
+from typing import Dict, Literal
+from sqlalchemy import text
+import json
 import os
-from agent_pipeline import trigger_explore
+from contextlib import asynccontextmanager
 # ---- import or paste your entire agent script here ----------
 
 from dotenv import load_dotenv
 
-from chatbot_service.agent_factory import ChatSession, build_agent
-from config import CAT_COL, DB_URL, TABLE
+from chatbot_service.agent_factory import ChatSession, get_chat_resources
+from chatbot_service.helpers import json_safe
+from chatbot_service.session_backends import make_session_backend
+from chatbot_service.session_store import SessionStore
+from config import (
+    CAT_COL, DB_URL, TABLE,
+    LLM_CACHE_BACKEND, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL,
+    CHAT_MAX_SESSIONS, CHAT_SESSION_TTL, CHAT_MEMORY_TURNS, CHAT_SESSION_BACKEND,
+    JOB_DB_PATH, JOB_MAX_WORKERS,
+)
+from utils.engine_registry import dispose_engines, engine_metrics
+from utils.job_runner import JobRunner, JobStore
+from utils.llm_cache import install_llm_cache
 load_dotenv()  # this reads .env and injects into os.environ
 
+# one response cache for every chat model in this process (pipeline,
+# category summaries, text-to-SQL); a no-op if agent_pipeline set it up
+llm_cache = install_llm_cache(
+    LLM_CACHE_BACKEND, DB_URL, LLM_CACHE_PATH,
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=LLM_CACHE_TTL,
+)
+
 
 gemini = ChatGoogleGenerativeAI(
     model="gemini-2.0-flash",
     temperature=0.0
 )
 
+# pipeline runs execute in a process pool, state in a local job table;
+# the pipeline module is imported by the pool processes, not by the API
+PIPELINE_JOB = "agent_pipeline:trigger_explore"
+jobs = JobRunner(JobStore(JOB_DB_PATH), max_workers=JOB_MAX_WORKERS)
+
 
 # ------------------------------------------------------------
 #  FastAPI setup
 # ------------------------------------------------------------
-app = FastAPI(title="Category Text‑to‑SQL Agent")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    jobs.shutdown()                 # queued jobs stay queued for the next start
+    dispose_engines()               # close every pooled connection
+
+
+app = FastAPI(title="Category Text‑to‑SQL Agent", lifespan=lifespan)
 
 class AskRequest(BaseModel):
     message: str
@@ -49,27 +82,87 @@ def ask_endpoint(body: AskRequest):
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 class TriggerRequest(BaseModel):
-    x: int
-    y: int
+    mode: Literal["sample", "propagate"] = "sample"
+    write_mode: Literal["rebuild", "upsert"] = "rebuild"
 
 class TriggerResponse(BaseModel):
-    result: Any
+    job_id: str
+    status: str
 
 
-@app.post("/trigger", response_model=TriggerResponse)
-async def trigger_endpoint(body: TriggerRequest):
+@app.post("/trigger", response_model=TriggerResponse, status_code=202)
+def trigger_endpoint(body: TriggerRequest):
     """
-    Calls `my_heavy_function` with the JSON payload and
-    returns the result.  Handles all errors as HTTP 500.
+    Queues `trigger_explore` in the job pool and returns at once; poll
+    /jobs/{job_id} for per-stage progress.
     """
     try:
-        output = trigger_explore
-        return TriggerResponse(result=output)
+        job_id = jobs.submit(PIPELINE_JOB, mode=body.mode, write_mode=body.write_mode)
+        return TriggerResponse(job_id=job_id, status=jobs.get(job_id)["status"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-sessions: Dict[str, "AgentExecutor"] = {}
+@app.get("/jobs")
+def list_jobs(limit: int = 50):
+    """Most recent jobs first."""
+    return jobs.list(limit)
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Status, current stage and per-stage counters of one job."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """
+    Cancel a queued job immediately, a running one at its next progress
+    report (stage boundary or written chunk).
+    """
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is unknown or already finished.")
+    return jobs.get(job_id)
+
+
+@app.get("/llm-cache")
+def llm_cache_stats():
+    """Hit/miss counters of the shared LLM response cache."""
+    if llm_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_cache.stats()}
+
+
+@app.get("/sessions")
+def session_stats():
+    """Size, evictions and approximate memory of the chat session store."""
+    return sessions.stats()
+
+
+@app.get("/db-pools")
+def db_pool_stats():
+    """Connection pool counters of the shared SQLAlchemy engines."""
+    return engine_metrics()
+
+
+# LLM client, engine, SQL chain and category catalog are shared by every
+# session; each session only keeps its own flags, schema and history.
+# With CHAT_SESSION_BACKEND=postgres that state lives in `chat_sessions`,
+# so any worker can serve any session (uvicorn api:app --workers N).
+chat_resources = get_chat_resources(DB_URL, TABLE, CAT_COL, gemini)
+sessions = SessionStore(
+    lambda: ChatSession(chat_resources, memory_turns=CHAT_MEMORY_TURNS),
+    max_sessions=CHAT_MAX_SESSIONS,
+    idle_ttl=CHAT_SESSION_TTL,
+    backend=make_session_backend(CHAT_SESSION_BACKEND, DB_URL),
+    restore=lambda state: ChatSession.from_state(
+        chat_resources, state, memory_turns=CHAT_MEMORY_TURNS
+    ),
+)
 
 class ChatReq(BaseModel):
     session_id: str
@@ -81,22 +174,33 @@ class ChatRes(BaseModel):
 @app.post("/chat", response_model=ChatRes)
 def chat(body: ChatReq):
     try:
-        if body.session_id not in sessions:
-            # build underlying LangChain agent once
-            lc_agent = build_agent(DB_URL, TABLE, CAT_COL, gemini)
-            sessions[body.session_id] = ChatSession(
-                lc_agent,                # the agent you already wrote
-                create_engine(DB_URL),   # for listing categories
-                TABLE,
-                CAT_COL,
-                llm=gemini
-            )
-        reply = sessions[body.session_id].send(body.message)
+        reply = sessions.send(body.session_id, body.message)
         
         print(reply)
         return ChatRes(answer=reply)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _ndjson(events):
+    """One JSON object per line; an exception becomes a final error event."""
+    try:
+        for event in events:
+            yield json.dumps(event, default=json_safe) + "\n"
+    except Exception as e:
+        yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+
+@app.post("/chat/stream")
+def chat_stream(body: ChatReq):
+    """
+    `/chat` as newline-delimited JSON events (token / tool_call /
+    tool_result, then done with the full answer), flushed as they happen.
+    """
+    return StreamingResponse(
+        _ndjson(sessions.stream(body.session_id, body.message)),
+        media_type="application/x-ndjson",
+    )
     
     
 if __name__ == "__main__":
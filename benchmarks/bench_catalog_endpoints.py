@@ -0,0 +1,165 @@
+"""
+Load-test the catalog endpoints of `main.py` with the blocking
+`PostgresDB` (before) and `AsyncPostgresDB` (after) behind the same
+`async def` handlers, and report requests/sec and latency percentiles.
+
+Each app runs under uvicorn in its own process and is driven over
+HTTP by `--concurrency` clients, so a blocking query holds up every
+other request queued on the server's event loop.  `--rtt` adds a
+`pg_sleep` per request to stand in for network round trips to a remote
+database.
+
+Needs a reachable Postgres (DB_HOST / DB_PORT / DB_USER / DB_PASSWORD /
+DB_NAME, as for main.py).  Run with:
+`python -m benchmarks.bench_catalog_endpoints`
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+
+from utils.async_database import AsyncPostgresDB
+from utils.database_connection import PostgresDB
+
+
+def db_kwargs(pool_size):
+    return dict(
+        dbname=os.getenv("DB_NAME", "devdb"),
+        user=os.getenv("DB_USER", "devuser"),
+        password=os.getenv("DB_PASSWORD", "devpassword"),
+        host=os.getenv("DB_HOST", "localhost"),
+        port=os.getenv("DB_PORT", "5433"),
+        min_size=pool_size,
+        max_size=pool_size,
+    )
+
+
+def sync_app(db, rtt):
+    @asynccontextmanager
+    async def lifespan(app):
+        db.connect()
+        yield
+        db.disconnect()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/tables/{table_name}/columns")
+    async def columns(table_name: str):
+        if rtt:
+            with db.cursor() as cur:
+                cur.execute("SELECT pg_sleep(%s)", (rtt,))
+        return db.get_table_columns(table_name)
+
+    return app
+
+
+def async_app(db, rtt):
+    @asynccontextmanager
+    async def lifespan(app):
+        await db.connect()
+        yield
+        await db.disconnect()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/tables/{table_name}/columns")
+    async def columns(table_name: str):
+        if rtt:
+            await db.pool.execute("SELECT pg_sleep($1)", rtt)
+        return await db.get_table_columns(table_name)
+
+    return app
+
+
+def _serve(kind, pool_size, rtt, port):
+    make_app, db_cls = APPS[kind]
+    app = make_app(db_cls(**db_kwargs(pool_size)), rtt)
+    uvicorn.run(app, port=port, log_level="warning")
+
+
+@contextmanager
+def serve(kind, args):
+    """Run one app under uvicorn in a separate process."""
+    proc = multiprocessing.Process(
+        target=_serve, args=(kind, args.pool_size, args.rtt, args.port), daemon=True
+    )
+    proc.start()
+    base_url = f"http://127.0.0.1:{args.port}"
+    for _ in range(200):
+        try:
+            httpx.get(base_url + "/docs", timeout=1)
+            break
+        except httpx.TransportError:
+            time.sleep(0.05)
+    try:
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.join()
+
+
+async def load(base_url, path, requests, concurrency):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(path)
+
+    async def worker(client):
+        while not queue.empty():
+            url = queue.get_nowait()
+            t0 = time.perf_counter()
+            resp = await client.get(url)
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    lat = np.array(latencies) * 1000
+    return {
+        "rps": requests / elapsed,
+        "p50": float(np.percentile(lat, 50)),
+        "p99": float(np.percentile(lat, 99)),
+    }
+
+
+APPS = {
+    "blocking psycopg2": (sync_app, PostgresDB),
+    "asyncpg": (async_app, AsyncPostgresDB),
+}
+
+
+def run(args):
+    path = f"/tables/{args.table}/columns"
+    for name in APPS:
+        with serve(name, args) as base_url:
+            asyncio.run(load(base_url, path, min(50, args.requests), args.concurrency))
+            r = asyncio.run(load(base_url, path, args.requests, args.concurrency))
+        print(f"{name:<18} {r['rps']:8.1f} req/s   p50 {r['p50']:7.1f} ms   "
+              f"p99 {r['p99']:7.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--pool-size", type=int, default=10)
+    ap.add_argument("--rtt", type=float, default=0.005,
+                    help="simulated DB round trip per request, seconds")
+    ap.add_argument("--table", default="nodes_categorized")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Name synthetic clusters with a fake LLM that adds artificial latency and
+compare the old one-call-per-cluster loop (sequential) with the concurrent
+and the batched (several clusters per JSON-reply prompt) paths.
+
+Run with:
+`python -m benchmarks.bench_cluster_naming --clusters 40 --latency 0.5`
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from agent_pipeline import name_clusters_via_llm
+
+
+class FakeThrottle(Exception):
+    status_code = 429
+
+
+class FakeLLM:
+    """
+    `predict`-compatible stand-in.  Sleeps `latency` per call, hangs for
+    `hang` seconds with probability `hang_rate` and raises a 429 with
+    probability `throttle_rate`.  A cluster's name is derived from its
+    first example row, so single and batched prompts agree.  Batched
+    replies leave out each cluster with probability `drop_rate`.
+    """
+
+    def __init__(self, latency=0.5, hang=0.0, hang_rate=0.0, throttle_rate=0.0,
+                 drop_rate=0.0, seed=0):
+        self.latency = latency
+        self.hang = hang
+        self.hang_rate = hang_rate
+        self.throttle_rate = throttle_rate
+        self.drop_rate = drop_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def predict(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+            roll = self._rng.random()
+        if roll < self.hang_rate:
+            time.sleep(self.hang)
+        elif roll < self.hang_rate + self.throttle_rate:
+            raise FakeThrottle("429 Resource has been exhausted")
+        time.sleep(self.latency)
+
+        blocks = re.findall(r"Cluster (\S+) example rows:\n(.*)", prompt)
+        if not blocks:
+            first = prompt.split("Example rows:\n", 1)[1].split("\n", 1)[0]
+            return f'"{self._name(first)}"'
+        with self._lock:
+            kept = [(l, row) for l, row in blocks if self._rng.random() >= self.drop_rate]
+        reply = {l: self._name(row) for l, row in kept}
+        return "```json\n" + json.dumps(reply) + "\n```"
+
+    @staticmethod
+    def _name(first_row: str) -> str:
+        return f"Category {hashlib.md5(first_row.encode()).hexdigest()[:6]}"
+
+
+def make_clusters(n_clusters: int, rows_per_cluster: int = 30) -> pd.DataFrame:
+    labels = np.repeat(np.arange(-1, n_clusters), rows_per_cluster)
+    return pd.DataFrame({
+        "cluster_label": labels,
+        "amenity": [f"amenity_{l}" for l in labels],
+        "name": [f"place {i}" for i in range(len(labels))],
+    })
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clusters", type=int, default=40)
+    ap.add_argument("--latency", type=float, default=0.5)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--per-call", type=int, default=10)
+    args = ap.parse_args()
+
+    df = make_clusters(args.clusters)
+    cols = ["amenity", "name"]
+
+    seq_llm = FakeLLM(latency=args.latency)
+    t0 = time.perf_counter()
+    _, seq_map = name_clusters_via_llm(df, "cluster_label", cols, llm=seq_llm,
+                                       max_concurrency=1)
+    t_seq = time.perf_counter() - t0
+
+    con_llm = FakeLLM(latency=args.latency)
+    t0 = time.perf_counter()
+    _, con_map = name_clusters_via_llm(df, "cluster_label", cols, llm=con_llm,
+                                       max_concurrency=args.concurrency)
+    t_con = time.perf_counter() - t0
+
+    flaky = FakeLLM(latency=args.latency, hang=10 * args.latency, hang_rate=0.1,
+                    throttle_rate=0.1, seed=1)
+    t0 = time.perf_counter()
+    _, flaky_map = name_clusters_via_llm(df, "cluster_label", cols, llm=flaky,
+                                         max_concurrency=args.concurrency,
+                                         timeout=3 * args.latency, max_retries=3)
+    t_flaky = time.perf_counter() - t0
+
+    bat_llm = FakeLLM(latency=args.latency, drop_rate=0.05)
+    t0 = time.perf_counter()
+    _, bat_map = name_clusters_via_llm(df, "cluster_label", cols, llm=bat_llm,
+                                       clusters_per_call=args.per_call,
+                                       max_concurrency=args.concurrency)
+    t_bat = time.perf_counter() - t0
+
+    assert seq_map == con_map, "concurrent naming changed the mapping"
+    assert seq_map == bat_map, "batched naming changed the mapping"
+    assert list(con_map) == sorted(con_map)
+    unknown = sum(v == "unknown" for v in flaky_map.values())
+    print(f"clusters={args.clusters}  latency={args.latency}s")
+    print(f"sequential           : {t_seq:6.2f}s  ({seq_llm.calls} calls)")
+    print(f"concurrent (x{args.concurrency})".ljust(21) + f": {t_con:6.2f}s  ({con_llm.calls} calls)")
+    print(f"concurrent + flaky   : {t_flaky:6.2f}s  ({flaky.calls} calls, {unknown} unknown)")
+    print(f"batched ({args.per_call}/call)".ljust(21) + f": {t_bat:6.2f}s  ({bat_llm.calls} calls)")
+    print("mapping identical ✅")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Cluster synthetic 768-d embeddings with HDBSCAN the old way (full float64
+vectors) and through `reduce_embeddings` (randomized PCA to a few
+dimensions, float32), and report fit time, peak memory and agreement
+(adjusted Rand index) with the full-vector labels and with the true blobs.
+
+Every configuration runs in a fresh process and starts from the embedding
+lists `embed_documents` returns; "peak MB" is the growth of the RSS
+high-water mark from there through array build, PCA and HDBSCAN.
+
+Run with:
+`python -m benchmarks.bench_hdbscan_reduction --rows 20000 --dims 16,32,64`
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+from sklearn.preprocessing import normalize
+
+from utils.clustering import fit_hdbscan, reduce_embeddings
+
+
+def make_embeddings(n: int, dim: int, clusters: int, noise: float, seed: int = 0):
+    """L2-normalized blobs around random directions plus uniform noise rows."""
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.normal(size=(clusters, dim)))
+    n_noise = int(n * noise)
+    truth = rng.integers(clusters, size=n - n_noise)
+    X = centers[truth] + rng.normal(scale=0.6 / np.sqrt(dim) * 4, size=(len(truth), dim))
+    X = np.vstack([X, rng.normal(size=(n_noise, dim))])
+    truth = np.concatenate([truth, np.full(n_noise, -1)])
+    return normalize(X), truth
+
+
+def _status_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def reset_peak() -> None:
+    """Restart the VmHWM high-water mark (Linux) at the current RSS."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def run_config(args, reduce_dim: int, float32: bool, n_jobs: int):
+    X, truth = make_embeddings(args.rows, args.dim, args.clusters, args.noise)
+    vectors = X.tolist()                  # what `embed_documents` returns
+    del X
+    base = _status_mb("VmRSS")
+    reset_peak()
+    t0 = time.perf_counter()
+    if float32:                           # `embed_rows` now
+        X = normalize(np.asarray(vectors, dtype=np.float32), copy=False)
+        X, _ = reduce_embeddings(X, reduce_dim)
+    else:                                 # `embed_rows` before
+        X = normalize(np.array(vectors))
+    t_reduce = time.perf_counter() - t0
+    labels = fit_hdbscan(X, min_cluster_size=args.min_cluster_size,
+                         core_dist_n_jobs=n_jobs).labels_
+    elapsed = time.perf_counter() - t0
+    peak = _status_mb("VmHWM") - base
+    return labels, truth, elapsed, t_reduce, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--clusters", type=int, default=30)
+    ap.add_argument("--noise", type=float, default=0.05)
+    ap.add_argument("--min-cluster-size", type=int, default=20)
+    ap.add_argument("--dims", default="16,32,64", help="PCA dimensions to try")
+    ap.add_argument("--n-jobs", type=int, default=-1, help="core_dist_n_jobs for new paths")
+    args = ap.parse_args()
+
+    configs = [("full float64 (old path)", 0, False, 4),
+               ("full float32", 0, True, args.n_jobs)]
+    configs += [(f"PCA {d} float32", d, True, args.n_jobs)
+                for d in map(int, args.dims.split(","))]
+
+    print(f"{args.rows} rows × {args.dim} dims, {args.clusters} blobs, "
+          f"{args.noise:.0%} noise")
+    print(f"{'path':<24}{'time s':>9}{'(prep s)':>9}{'peak MB':>10}"
+          f"{'clusters':>10}{'ARI/full':>10}{'ARI/true':>10}")
+    ref = None
+    ctx = multiprocessing.get_context("spawn")
+    for name, dim, f32, n_jobs in configs:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            labels, truth, elapsed, t_reduce, peak = pool.submit(
+                run_config, args, dim, f32, n_jobs).result()
+        ref = labels if ref is None else ref
+        print(f"{name:<24}{elapsed:>9.2f}{t_reduce:>9.2f}{peak:>10.1f}"
+              f"{labels.max() + 1:>10}{adjusted_rand_score(ref, labels):>10.3f}"
+              f"{adjusted_rand_score(truth, labels):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
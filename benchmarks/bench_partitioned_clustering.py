@@ -0,0 +1,72 @@
+"""
+Compare one HDBSCAN fit over every row with `cluster_partitioned`
+(k-means shards clustered in a process pool, close clusters merged across
+shards) on synthetic embeddings reduced to `--reduce-dim` by PCA, as
+`cluster_hdbscan_gemini` does.  Reports wall time, peak memory of the
+clustering step, cluster count and adjusted Rand index against the single
+fit and against the true blobs.
+
+Run with:
+`python -m benchmarks.bench_partitioned_clustering --rows 50000 --partitions 4,8,16`
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sklearn.metrics import adjusted_rand_score
+
+from utils.clustering import cluster_partitioned, fit_hdbscan, reduce_embeddings
+from benchmarks.bench_hdbscan_reduction import _status_mb, make_embeddings, reset_peak
+
+
+def run_config(args, n_partitions: int):
+    X, truth = make_embeddings(args.rows, args.dim, args.clusters, args.noise)
+    X, _ = reduce_embeddings(X, args.reduce_dim)
+    base = _status_mb("VmRSS")
+    reset_peak()
+    t0 = time.perf_counter()
+    if n_partitions > 1:
+        labels = cluster_partitioned(X, n_partitions, min_cluster_size=args.min_cluster_size,
+                                     merge_distance=args.merge_distance, halo=args.halo,
+                                     n_workers=args.workers)
+    else:
+        labels = fit_hdbscan(X, min_cluster_size=args.min_cluster_size).labels_
+    elapsed = time.perf_counter() - t0
+    # pool processes have their own RSS; the parent's peak is what one
+    # process has to hold, each shard worker holds only its shard
+    return labels, truth, elapsed, _status_mb("VmHWM") - base
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--clusters", type=int, default=60)
+    ap.add_argument("--noise", type=float, default=0.05)
+    ap.add_argument("--reduce-dim", type=int, default=32)
+    ap.add_argument("--min-cluster-size", type=int, default=20)
+    ap.add_argument("--partitions", default="4,8,16")
+    ap.add_argument("--merge-distance", type=float, default=0.3)
+    ap.add_argument("--halo", type=float, default=0.05)
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+
+    print(f"{args.rows} rows × {args.dim} dims → PCA {args.reduce_dim}, "
+          f"{args.clusters} blobs, {args.noise:.0%} noise")
+    print(f"{'path':<18}{'time s':>9}{'peak MB':>10}{'clusters':>10}"
+          f"{'ARI/single':>12}{'ARI/true':>10}")
+    ref = None
+    ctx = multiprocessing.get_context("spawn")
+    for n in [1] + [int(p) for p in args.partitions.split(",")]:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            labels, truth, elapsed, peak = pool.submit(run_config, args, n).result()
+        ref = labels if ref is None else ref
+        name = "single fit" if n == 1 else f"{n} partitions"
+        print(f"{name:<18}{elapsed:>9.2f}{peak:>10.1f}{labels.max() + 1:>10}"
+              f"{adjusted_rand_score(ref, labels):>12.3f}"
+              f"{adjusted_rand_score(truth, labels):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
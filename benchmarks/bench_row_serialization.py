@@ -0,0 +1,80 @@
+"""
+Compare the per-cell `applymap(_ser)` row serialization with the columnar
+`serialize_rows` used by `cluster_hdbscan_gemini`, and check that both
+produce byte-identical text.
+
+Run with:
+`python -m benchmarks.bench_row_serialization --rows 50000`
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from agent_pipeline import _ser, serialize_rows
+
+
+def make_nodes(n: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic frame shaped like the OSM `nodes` table."""
+    rng = random.Random(seed)
+    amenities = ["bench", "cafe", "bicycle_parking", "waste_basket", "restaurant", None]
+    names = ["Zuiderterras", "De Koninck", "'t Stad", "Groenplaats", "", "12", "true"]
+
+    def tags():
+        t = {"amenity": rng.choice(amenities[:-1])}
+        if rng.random() < 0.5:
+            t["name"] = rng.choice(names)
+        if rng.random() < 0.3:
+            t["opening_hours"] = {"mo": "09:00-17:00", "sa": None}
+        return t
+
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "type": ["node"] * n,
+        "tags_json": [json.dumps(tags()) for _ in range(n)],           # JSON text
+        "tags_dict": [tags() for _ in range(n)],                        # JSONB → dict
+        "name": [rng.choice(names + [None]) for _ in range(n)],
+        "amenity": [rng.choice(amenities) for _ in range(n)],
+        "lat": [51.2 + rng.random() / 10 for _ in range(n)],
+        "note": [rng.choice(["[1, 2]", "null", "-", "NaN", " {\"a\": 1}", "x"]) for _ in range(n)],
+    })
+
+
+def legacy(df: pd.DataFrame, columns):
+    frame = df[columns]
+    cellwise = frame.map if hasattr(frame, "map") else frame.applymap
+    return cellwise(_ser).agg(" | ".join, axis=1).tolist()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    df = make_nodes(args.rows)
+    cols = [c for c in df.columns if c != "id"]
+
+    def best(fn):
+        times, out = [], None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            out = fn(df, cols)
+            times.append(time.perf_counter() - t0)
+        return min(times), out
+
+    t_old, old = best(legacy)
+    t_new, new = best(serialize_rows)
+
+    assert old == new, "columnar serializer output differs from _ser path"
+    print(f"rows={args.rows}  columns={len(cols)}")
+    print(f"applymap(_ser) : {t_old:7.3f}s")
+    print(f"serialize_rows : {t_new:7.3f}s   ({t_old / t_new:.1f}× faster)")
+    print("byte-identical ✅")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,89 @@
 import json, re
-import pandas as pd
-from typing import Dict
-from sqlalchemy import create_engine, text
+import threading
+from typing import Dict, Generator, Iterator, Optional
+from sqlalchemy import text
 from langchain.tools import Tool
 from langchain.memory import ConversationBufferMemory
 from langchain.chains import create_sql_query_chain
 from langchain.agents import initialize_agent, AgentType
+from langchain_community.utilities import SQLDatabase
+from langchain_core.messages import messages_from_dict, messages_to_dict
 
 
-from chatbot_service.helpers import (
-    build_category_schema,
-    summarize_category_with_llm,
-    json_safe,
-)
+from chatbot_service.helpers import json_safe
+from utils.async_utils import iter_blocking
+from utils.engine_registry import get_engine
+from chatbot_service.category_catalog import get_catalog
+from chatbot_service.profile_store import get_or_build_profile, stream_profile
 
-# DB / table names are injected by api.py when it calls build_agent()
-def build_agent(DB_URL: str, TABLE: str, CAT_COL: str, llm) -> "AgentExecutor":
+# ------------------------------------------------------------------
+#  Shared, per-process pieces: LLM client, engine, SQL chain, catalog
+# ------------------------------------------------------------------
+class ChatResources:
+    """Everything a chat session needs that is identical across sessions."""
+
+    def __init__(self, db_url: str, table: str, cat_col: str, llm):
+        self.db_url  = db_url
+        self.table   = table
+        self.cat_col = cat_col
+        self.llm     = llm
+        self.engine  = get_engine(db_url)
+        self.catalog = get_catalog(self.engine, table, cat_col)
+        self._sql_chain = None
+        self._lock = threading.Lock()
+
+    @property
+    def sql_chain(self):
+        """Text-to-SQL chain; table reflection happens once, on first use."""
+        with self._lock:
+            if self._sql_chain is None:
+                db = SQLDatabase(self.engine, include_tables=[self.table])
+                self._sql_chain = create_sql_query_chain(self.llm, db)
+            return self._sql_chain
+
+
+_resources: Dict[tuple, ChatResources] = {}
+_resources_lock = threading.Lock()
 
-    sql_db  = create_engine(DB_URL)
-    sql_lc  = create_sql_query_chain(llm, sql_db)
+def get_chat_resources(db_url: str, table: str, cat_col: str, llm) -> ChatResources:
+    key = (db_url, table, cat_col, id(llm))
+    with _resources_lock:
+        if key not in _resources:
+            _resources[key] = ChatResources(db_url, table, cat_col, llm)
+        return _resources[key]
 
-    state: Dict[str, object] = {"cat": None, "schema": {}}
-    memory = ConversationBufferMemory(return_messages=True)
+
+# DB / table names are injected by api.py when it calls build_agent()
+def build_agent(
+    DB_URL: str,
+    TABLE: str,
+    CAT_COL: str,
+    llm,
+    state: Optional[Dict[str, object]] = None,
+    memory: Optional[ConversationBufferMemory] = None,
+) -> "AgentExecutor":
+    """
+    Agent with choose_category / ask_sql tools.  `state` and `memory` are
+    the only per-session parts; everything else comes from the shared
+    `ChatResources`.
+    """
+    res     = get_chat_resources(DB_URL, TABLE, CAT_COL, llm)
+    sql_db  = res.engine
+    catalog = res.catalog
+
+    if state is None:
+        state = {"cat": None, "schema": {}}
+    if memory is None:
+        memory = ConversationBufferMemory(return_messages=True)
 
     # -------- choose_category tool --------------------------------
     def choose(cat: str) -> str:
-        with sql_db.connect() as conn:
-            df = pd.read_sql(text(f"SELECT * FROM {TABLE} WHERE {CAT_COL}=:c"),
-                             conn, params={"c": cat})
-        if df.empty:
+        if cat not in catalog:
             return f"❌ Category '{cat}' not found."
+        profile = get_or_build_profile(sql_db, TABLE, cat, llm, CAT_COL)
         state["cat"]    = cat
-        state["schema"] = build_category_schema(df, cat)
-        return summarize_category_with_llm(df, cat, llm)["narrative"]
+        state["schema"] = profile["schema"]
+        return profile["narrative"]
 
     choose_tool = Tool(
         name="choose_category",
@@ -55,7 +106,7 @@ Rules:
 • Use only `{TABLE}`.
 • Filter by {CAT_COL} = '{cat}'.
 """
-        raw_sql = sql_lc.run(prompt)
+        raw_sql = res.sql_chain.invoke({"question": prompt})
         final_sql = (
             raw_sql.rstrip(";") + f" WHERE {CAT_COL}='{cat}';"
             if "WHERE" not in raw_sql.upper()
@@ -63,7 +114,7 @@ Rules:
         )
         with sql_db.connect() as conn:
             rows = conn.execute(text(final_sql)).fetchmany(25)
-        return json.dumps([dict(r) for r in rows], indent=2, default=json_safe)
+        return json.dumps([dict(r._mapping) for r in rows], indent=2, default=json_safe)
 
     ask_tool = Tool(
         name="ask_sql",
@@ -83,27 +134,69 @@ Rules:
 # ------------------------------------------------------------------
 #  SessionManager: front‑door that enforces {hi → pick category}
 # ------------------------------------------------------------------
-from sqlalchemy import text
-from sqlalchemy import text
-import pandas as pd
-
-from sqlalchemy import text
 class ChatSession:
-    def __init__(self, agent, sql_db, table: str, cat_col: str, llm):
-        self.agent           = agent
-        self.sql_db          = sql_db
-        self.table           = table
-        self.cat_col         = cat_col
-        self.llm             = llm
+    """
+    Per-user state only: menu/category flags, the chosen category's
+    schema and a conversation memory capped at `memory_turns` exchanges.
+    The agent is built on the first free-form question.
+    """
+
+    def __init__(self, resources: ChatResources, memory_turns: int = 10):
+        self.res             = resources
+        self.memory_turns    = memory_turns
+        self.state: Dict[str, object] = {"cat": None, "schema": {}}
+        self.memory          = ConversationBufferMemory(return_messages=True)
+        self._agent          = None
         self.menu_shown      = False
         self.category_chosen = False
+        self.revision        = ""     # new token from SessionStore after each turn
+
+    # -------- externalized state (see session_backends.py) --------
+    def to_state(self) -> Dict[str, object]:
+        return {
+            "revision":        self.revision,
+            "menu_shown":      self.menu_shown,
+            "category_chosen": self.category_chosen,
+            "cat":             self.state["cat"],
+            "schema":          self.state["schema"],
+            "history":         messages_to_dict(self.memory.chat_memory.messages),
+        }
+
+    @classmethod
+    def from_state(cls, resources: ChatResources, state: Dict[str, object],
+                   memory_turns: int = 10) -> "ChatSession":
+        """Rehydrate on any worker; the agent is rebuilt lazily from this."""
+        session = cls(resources, memory_turns)
+        session.revision        = state["revision"]
+        session.menu_shown      = state["menu_shown"]
+        session.category_chosen = state["category_chosen"]
+        session.state["cat"]    = state["cat"]
+        session.state["schema"] = state["schema"]
+        session.memory.chat_memory.messages = messages_from_dict(state["history"])
+        return session
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            self._agent = build_agent(
+                self.res.db_url, self.res.table, self.res.cat_col, self.res.llm,
+                state=self.state, memory=self.memory,
+            )
+        return self._agent
+
+    def _trim_memory(self) -> None:
+        messages = self.memory.chat_memory.messages
+        keep = 2 * self.memory_turns
+        if len(messages) > keep:
+            del messages[:-keep]
+
+    def approx_bytes(self) -> int:
+        """Rough size of the per-session state (history + schema text)."""
+        history = sum(len(str(m.content)) for m in self.memory.chat_memory.messages)
+        return history + len(json.dumps(self.state["schema"], default=json_safe))
 
     def _category_menu(self) -> str:
-        rows = self.sql_db.connect().execute(
-            text(f"SELECT DISTINCT {self.cat_col} FROM {self.table} ORDER BY 1")
-        )
-        cats = [r[0] for r in rows]
-        bullets = "\n".join(f"- {c}" for c in cats)
+        bullets = "\n".join(f"- {c}" for c in self.res.catalog.categories())
         return (
             "👋 Hi!\n\nHere are the available categories:\n"
             f"{bullets}\n\n"
@@ -111,35 +204,87 @@ class ChatSession:
         )
 
     def send(self, user_msg: str) -> str:
+        for event in self.send_stream(user_msg):
+            pass
+        return event["answer"]
+
+    def send_stream(self, user_msg: str) -> Iterator[Dict[str, object]]:
+        """
+        One turn as events: {"type": "token", "content"} pieces of the
+        reply, {"type": "tool_call"/"tool_result", ...} agent steps, then
+        {"type": "done", "answer"} with the full reply.  Flags and schema
+        only change once the turn has completed.
+        """
         # 1) First turn: show the menu
         if not self.menu_shown:
+            menu = self._category_menu()
+            yield {"type": "token", "content": menu}
             self.menu_shown = True
-            return self._category_menu()
+            yield {"type": "done", "answer": menu}
+            return
 
         # 2) Second turn: treat as the category choice
         if not self.category_chosen:
-            self.category_chosen = True
+            if user_msg not in self.res.catalog:
+                reply = f"❌ Category '{user_msg}' not found. Try again."
+                yield {"type": "token", "content": reply}
+                yield {"type": "done", "answer": reply}
+                return
 
-            # a) Load the slice
-            df_cat = pd.read_sql(
-                text(f"SELECT * FROM {self.table} WHERE {self.cat_col} = :c"),
-                self.sql_db,
-                params={"c": user_msg}
-            )
-            if df_cat.empty:
-                return f"❌ Category '{user_msg}' not found. Try again."
+            # a) Stored profile (built by the pipeline, or now on a miss,
+            #    in which case the narrative arrives token by token)
+            profile = yield from _as_tokens(stream_profile(
+                self.res.engine, self.res.table, user_msg, self.res.llm, self.res.cat_col
+            ))
 
-            # b) Build schema & narrative
-            schema    = build_category_schema(df_cat, user_msg, self.cat_col)
-            narrative = summarize_category_with_llm(df_cat, user_msg, self.llm)["narrative"]
+            # b) Store state for the ask_sql tool
+            self.category_chosen = True
+            self.state["cat"]    = user_msg
+            self.state["schema"] = profile["schema"]
+
+            # **Return only the narrative** — no further agent run here!
+            yield {"type": "done", "answer": profile["narrative"]}
+            return
 
-            # c) Store state for the ask_sql tool
-            choose_tool = next(t for t in self.agent.tools if t.name == "choose_category")
-            choose_tool.func.__self__.state["cat"]    = user_msg
-            choose_tool.func.__self__.state["schema"] = schema
+        # 3) All later turns: normal SQL Q&A via the agent, token by token.
+        #    LLM calls made inside a tool (the text-to-SQL chain) are not
+        #    part of the reply, so only top-level model tokens are passed on.
+        reply, streamed, in_tool = "", False, 0
+        events = iter_blocking(
+            lambda: self.agent.astream_events({"input": user_msg}, version="v2")
+        )
+        for event in events:
+            kind, data = event["event"], event["data"]
+            if kind == "on_tool_start":
+                in_tool += 1
+            elif kind == "on_tool_end":
+                in_tool -= 1
+            elif kind == "on_chat_model_stream" and not in_tool:
+                content = data["chunk"].content
+                if isinstance(content, str) and content:
+                    streamed = True
+                    yield {"type": "token", "content": content}
+            elif kind == "on_chain_stream" and not event["parent_ids"]:
+                chunk = data["chunk"]       # the agent's own step chunks
+                for action in chunk.get("actions", []):
+                    yield {"type": "tool_call", "tool": action.tool,
+                           "input": action.tool_input}
+                for step in chunk.get("steps", []):
+                    yield {"type": "tool_result", "tool": step.action.tool,
+                           "output": str(step.observation)}
+                if "output" in chunk:
+                    reply = chunk["output"]
+        if reply and not streamed:      # e.g. "Agent stopped due to iteration limit"
+            yield {"type": "token", "content": reply}
+        self._trim_memory()
+        yield {"type": "done", "answer": reply}
 
-            # **Return only the narrative** — no further agent.run() here!
-            return narrative
 
-        # 3) All later turns: normal SQL Q&A via the agent
-        return self.agent.run(user_msg)
+def _as_tokens(pieces: Generator[str, None, object]):
+    """Token events for each text piece; returns the generator's result."""
+    while True:
+        try:
+            piece = next(pieces)
+        except StopIteration as stop:
+            return stop.value
+        yield {"type": "token", "content": piece}
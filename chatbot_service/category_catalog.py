@@ -0,0 +1,95 @@
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from chatbot_service.profile_store import table_version
+
+# ─────────────────────── category catalog ───────────────────────
+# The category menu, held in memory per process.  It is reloaded only
+# when the table version (see profile_store.py) changes, and at most
+# one version check per `ttl` seconds — so a burst of new sessions costs
+# no table scans at all.
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def ensure_category_index(engine, table: str, cat_col: str = "generated_category") -> None:
+    """B-tree index on the category column (menu, filters and profiles use it)."""
+    index = _q(f"{table.split('.')[-1]}_{cat_col}_idx")
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({_q(cat_col)})"))
+
+
+def distinct_categories(engine, table: str, cat_col: str = "generated_category") -> List[str]:
+    """
+    Sorted distinct categories via a loose index scan (recursive CTE):
+    one index probe per category instead of reading the whole table.
+    """
+    c = _q(cat_col)
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            f"""
+            WITH RECURSIVE cats AS (
+                (SELECT {c}::text AS cat FROM {table} WHERE {c} IS NOT NULL ORDER BY {c} LIMIT 1)
+                UNION ALL
+                SELECT (SELECT {c}::text FROM {table} WHERE {c} > cats.cat ORDER BY {c} LIMIT 1)
+                FROM cats WHERE cats.cat IS NOT NULL
+            )
+            SELECT cat FROM cats WHERE cat IS NOT NULL
+            """
+        ))
+        return [r[0] for r in rows]
+
+
+class CategoryCatalog:
+    """In-memory list + set of the categories in `table`, kept per version."""
+
+    def __init__(self, engine, table: str, cat_col: str = "generated_category",
+                 ttl: float = 5.0):
+        self.engine = engine
+        self.table = table
+        self.cat_col = cat_col
+        self.ttl = ttl
+        self.version: Optional[str] = None
+        self._list: List[str] = []
+        self._set: FrozenSet[str] = frozenset()
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.ttl:
+                return
+            version = table_version(self.engine, self.table)
+            if force or version != self.version:
+                cats = distinct_categories(self.engine, self.table, self.cat_col) \
+                    if version is not None else []
+                self._list, self._set = cats, frozenset(cats)
+                self.version = version
+            self._checked_at = now
+
+    def categories(self) -> List[str]:
+        self.refresh()
+        return list(self._list)
+
+    def __contains__(self, category: str) -> bool:
+        self.refresh()
+        return category in self._set
+
+
+_catalogs: Dict[Tuple[str, str, str], CategoryCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(engine, table: str, cat_col: str = "generated_category") -> CategoryCatalog:
+    """One shared catalog per (database, table, column) in this process."""
+    key = (str(engine.url), table, cat_col)
+    with _catalogs_lock:
+        if key not in _catalogs:
+            _catalogs[key] = CategoryCatalog(engine, table, cat_col)
+        return _catalogs[key]
@@ -1,5 +1,7 @@
 import json, pandas as pd, numpy as np
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
+
+from chatbot_service.profiler import category_schema_sql, profile_category_sql
 
 
 import json
@@ -103,6 +105,8 @@ def json_safe(o):
 
 
 # ─────────────────── build_category_schema() ─────────────────────
+# `category_schema_sql` (chatbot_service/profiler.py) gives the same
+# mapping from the catalog without reading the rows.
 def build_category_schema(
     df: pd.DataFrame,
     category: str,
@@ -191,14 +195,44 @@ def summarize_category_with_llm(
             }
 
     # 3⃣  Ask LLM for narrative
-    prompt = f"""
+    return {"summary": summary, "narrative": _narrate(summary, category, llm)}
+
+
+def _narrative_prompt(summary: Dict[str, Any], category: str) -> str:
+    return f"""
 You are a data analyst. Summarize these statistics for the category "{category}"
 in 3‑4 sentences, highlighting notable patterns in markdown format.
 
 Stats JSON:
-{json.dumps(summary, indent=2)}
+{json.dumps(summary, indent=2, default=json_safe)}
 """
-    narrative = llm.predict(prompt).strip()
-    
 
-    return {"summary": summary, "narrative": narrative}
\ No newline at end of file
+
+def _narrate(summary: Dict[str, Any], category: str, llm) -> str:
+    return llm.predict(_narrative_prompt(summary, category)).strip()
+
+
+def narrate_stream(summary: Dict[str, Any], category: str, llm) -> Iterator[str]:
+    """`_narrate`, token by token as the LLM produces them."""
+    for chunk in llm.stream(_narrative_prompt(summary, category)):
+        if chunk.content:
+            yield chunk.content
+
+
+# ─────────────────── SQL push-down variants ──────────────────────
+def summarize_category_sql(
+    engine,
+    table: str,
+    category: str,
+    llm,
+    cat_col: str = "generated_category",
+) -> Dict[str, Any]:
+    """
+    Same result as `summarize_category_with_llm`, but the stats are
+    aggregated inside Postgres (see chatbot_service/profiler.py) instead
+    of loading every row of the category into pandas.
+    """
+    summary = profile_category_sql(engine, table, category, cat_col)
+    if not summary["n_rows"]:
+        return {"summary": {}, "narrative": f"No records for '{category}'."}
+    return {"summary": summary, "narrative": _narrate(summary, category, llm)}
\ No newline at end of file
@@ -0,0 +1,206 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Generator, Optional
+
+from sqlalchemy import text
+
+from chatbot_service.helpers import json_safe, narrate_stream, summarize_category_sql
+from chatbot_service.profiler import category_schema_sql, profile_category_sql
+
+# ─────────────────────── category profile store ───────────────────────
+# Schema + stats + narrative per category, computed once per table
+# version instead of on every chat session.  The version is
+# "<table oid>:<generation>": the oid changes when a table is dropped or
+# swapped, the generation whenever the pipeline writes to it, so stale
+# rows can never be served.
+
+_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS table_generations (
+        table_name TEXT PRIMARY KEY,
+        generation BIGINT NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS category_profiles (
+        table_name TEXT NOT NULL,
+        category   TEXT NOT NULL,
+        version    TEXT NOT NULL,
+        schema     JSONB NOT NULL,
+        summary    JSONB NOT NULL,
+        narrative  TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (table_name, category)
+    )
+    """,
+]
+_ready = set()
+
+
+def ensure_profile_tables(engine) -> None:
+    key = str(engine.url)
+    if key in _ready:
+        return
+    with engine.begin() as conn:
+        for ddl in _DDL:
+            conn.execute(text(ddl))
+    _ready.add(key)
+
+
+def bump_generation(engine, table: str) -> int:
+    """Mark `table` as rewritten: new generation, its profiles dropped."""
+    ensure_profile_tables(engine)
+    with engine.begin() as conn:
+        gen = conn.execute(
+            text(
+                """
+                INSERT INTO table_generations (table_name, generation) VALUES (:t, 1)
+                ON CONFLICT (table_name) DO UPDATE
+                SET generation = table_generations.generation + 1, updated_at = now()
+                RETURNING generation
+                """
+            ),
+            {"t": table},
+        ).scalar_one()
+        conn.execute(text("DELETE FROM category_profiles WHERE table_name = :t"),
+                     {"t": table})
+    return gen
+
+
+def table_version(engine, table: str) -> Optional[str]:
+    """Current version of `table`, or None if it does not exist."""
+    ensure_profile_tables(engine)
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                """
+                SELECT to_regclass(:t)::oid::bigint,
+                       coalesce((SELECT generation FROM table_generations
+                                 WHERE table_name = :t), 0)
+                """
+            ),
+            {"t": table},
+        ).one()
+    return None if row[0] is None else f"{row[0]}:{row[1]}"
+
+
+def get_profile(engine, table: str, category: str) -> Optional[Dict[str, Any]]:
+    """Stored {schema, summary, narrative} if it matches the table's version."""
+    version = table_version(engine, table)
+    if version is None:
+        return None
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                """
+                SELECT schema, summary, narrative FROM category_profiles
+                WHERE table_name = :t AND category = :c AND version = :v
+                """
+            ),
+            {"t": table, "c": category, "v": version},
+        ).mappings().first()
+    return dict(row) if row else None
+
+
+def put_profile(engine, table: str, category: str, version: str,
+                profile: Dict[str, Any]) -> None:
+    ensure_profile_tables(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO category_profiles
+                    (table_name, category, version, schema, summary, narrative)
+                VALUES (:t, :c, :v, CAST(:schema AS jsonb), CAST(:summary AS jsonb), :narrative)
+                ON CONFLICT (table_name, category) DO UPDATE
+                SET version = EXCLUDED.version, schema = EXCLUDED.schema,
+                    summary = EXCLUDED.summary, narrative = EXCLUDED.narrative,
+                    created_at = now()
+                """
+            ),
+            {
+                "t": table, "c": category, "v": version,
+                "schema": json.dumps(profile["schema"], default=json_safe),
+                "summary": json.dumps(profile["summary"], default=json_safe),
+                "narrative": profile["narrative"],
+            },
+        )
+
+
+def build_profile(engine, table: str, category: str, llm,
+                  cat_col: str = "generated_category") -> Dict[str, Any]:
+    result = summarize_category_sql(engine, table, category, llm, cat_col)
+    if not result["summary"]:
+        return {"schema": {}, **result}
+    return {"schema": category_schema_sql(engine, table, category, cat_col), **result}
+
+
+def get_or_build_profile(engine, table: str, category: str, llm,
+                         cat_col: str = "generated_category") -> Dict[str, Any]:
+    """
+    Stored profile when current, otherwise computed and stored.  An
+    unknown category comes back with an empty `summary` and is not stored.
+    """
+    profile = get_profile(engine, table, category)
+    if profile is not None:
+        return profile
+    version = table_version(engine, table)
+    profile = build_profile(engine, table, category, llm, cat_col)
+    if version is not None and profile["summary"]:
+        put_profile(engine, table, category, version, profile)
+    return profile
+
+
+def stream_profile(engine, table: str, category: str, llm,
+                   cat_col: str = "generated_category",
+                   ) -> Generator[str, None, Dict[str, Any]]:
+    """
+    `get_or_build_profile` that yields the narrative while it is written
+    (a stored one in a single piece) and returns the profile, so callers
+    can `profile = yield from stream_profile(...)`.  The profile is only
+    stored once the narrative is complete.
+    """
+    profile = get_profile(engine, table, category)
+    if profile is not None:
+        yield profile["narrative"]
+        return profile
+    version = table_version(engine, table)
+    summary = profile_category_sql(engine, table, category, cat_col)
+    if not summary["n_rows"]:
+        narrative = f"No records for '{category}'."
+        yield narrative
+        return {"schema": {}, "summary": {}, "narrative": narrative}
+    parts = []
+    for piece in narrate_stream(summary, category, llm):
+        parts.append(piece)
+        yield piece
+    profile = {
+        "schema": category_schema_sql(engine, table, category, cat_col),
+        "summary": summary,
+        "narrative": "".join(parts).strip(),
+    }
+    if version is not None:
+        put_profile(engine, table, category, version, profile)
+    return profile
+
+
+def refresh_profiles(engine, table: str, llm, cat_col: str = "generated_category",
+                     max_workers: int = 8) -> int:
+    """Profile every category of `table` (narratives in parallel); returns the count."""
+    version = table_version(engine, table)
+    if version is None:
+        return 0
+    with engine.connect() as conn:
+        cats = [r[0] for r in conn.execute(
+            text(f'SELECT DISTINCT "{cat_col}" FROM {table} WHERE "{cat_col}" IS NOT NULL')
+        )]
+
+    def _one(cat: str) -> None:
+        profile = build_profile(engine, table, cat, llm, cat_col)
+        if profile["summary"]:
+            put_profile(engine, table, cat, version, profile)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(_one, cats))
+    return len(cats)
@@ -0,0 +1,307 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import text
+
+from utils.table_catalog import column_kinds
+
+# ─────────────────────── SQL push-down profiler ───────────────────────
+# Computes the same summary dict as `summarize_category_with_llm`, but as
+# aggregate SQL over one category, so only the numbers leave Postgres.
+
+NUMERIC_TYPES = {"smallint", "integer", "bigint", "numeric", "decimal",
+                 "real", "double precision", "money"}
+JSON_TYPES = {"json", "jsonb"}
+SKIP_COLUMNS = ("assigned_category", "geometry")
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _lit(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def _py(v):
+    return float(v) if isinstance(v, Decimal) else v
+
+
+# at most this many aggregate expressions per SELECT (Postgres allows 1664)
+_MAX_TARGETS = 1000
+
+_KINDS: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+
+def _table_kinds(engine, table: str) -> Dict[str, str]:
+    """
+    `column_kinds` per table version, decided once so every category
+    agrees and re-detected after the pipeline rewrites the table.
+    """
+    # imported here: profile_store imports this module (via helpers)
+    from chatbot_service.profile_store import table_version
+
+    key = (str(engine.url), table, table_version(engine, table) or "")
+    if key not in _KINDS:
+        _KINDS[key] = column_kinds(engine, table)
+    return _KINDS[key]
+
+# PG < 16 has no pg_input_is_valid; this wrapper returns NULL instead of
+# raising on text that only looks like JSON
+_TRY_JSONB = """
+CREATE OR REPLACE FUNCTION try_jsonb(v text) RETURNS jsonb
+LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    RETURN v::jsonb;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END
+$$
+"""
+_try_jsonb_ready = set()
+
+def _jsonb(conn, col: str, dtype: str, alias: str = "") -> str:
+    """`col` as jsonb; text values that are not valid JSON become NULL."""
+    ref = alias + _q(col)
+    if dtype in JSON_TYPES:
+        return f"{ref}::jsonb"
+    if conn.dialect.server_version_info >= (16,):
+        return f"(CASE WHEN pg_input_is_valid({ref}, 'jsonb') THEN {ref}::jsonb END)"
+    key = str(conn.engine.url)
+    if key not in _try_jsonb_ready:
+        with conn.engine.begin() as ddl:
+            ddl.execute(text(_TRY_JSONB))
+        _try_jsonb_ready.add(key)
+    return f"try_jsonb({ref})"
+
+
+def _columns(conn, table: str) -> List[Tuple[str, str]]:
+    return conn.execute(
+        text(
+            """
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_name = :t AND table_schema = current_schema()
+            ORDER BY ordinal_position
+            """
+        ),
+        {"t": table},
+    ).all()
+
+
+def _json_keys(conn, table: str, col: str, dtype: str, cat_col: str,
+               category: str) -> List[Dict]:
+    """Top-level keys of a JSON column within the category, with value types."""
+    doc = _jsonb(conn, col, dtype, alias="t.")
+    rows = conn.execute(
+        text(
+            f"""
+            SELECT e.key,
+                   array_remove(array_agg(DISTINCT jsonb_typeof(e.value)), 'null') AS types,
+                   bool_and(jsonb_typeof(e.value) <> 'number'
+                            OR e.value::text ~ '^-?[0-9]+$') AS ints
+            FROM {table} t,
+                 jsonb_each(CASE WHEN jsonb_typeof({doc}) = 'object'
+                                 THEN {doc} END) AS e(key, value)
+            WHERE t.{_q(cat_col)} = :c
+            GROUP BY e.key
+            ORDER BY e.key
+            """
+        ),
+        {"c": category},
+    ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def _parsed(col: str) -> str:
+    """Column of `_category_rows` holding `col` parsed as jsonb."""
+    return _q(col + "__jsonb")
+
+def _category_rows(conn, table: str, where: str, cols: List[Tuple]) -> str:
+    """
+    `WITH t AS MATERIALIZED (…)`: the category's rows, with every JSON
+    source column parsed once per row instead of once per key expression.
+    """
+    parsed = "".join(
+        f", {_jsonb(conn, col, dtype)} AS {_parsed(col)}"
+        for col, dtype in dict.fromkeys(src for *_, src in cols if src is not None)
+    )
+    return f"WITH t AS MATERIALIZED (SELECT *{parsed} FROM {table} WHERE {where})"
+
+def profile_columns(
+    conn, table: str, cat_col: str, category: str, sep: str = "_",
+    kinds: Dict[str, str] | None = None,
+) -> List[Tuple[str, str, str, Tuple[str, str] | None]]:
+    """
+    (output name, SQL expression, kind, JSON source) for every profiled
+    column.  JSON columns – json/jsonb, or text holding JSON objects per
+    the table's `kinds` – are replaced by one entry per top-level key,
+    named `<col><sep><key>` like the pandas flattening, with source
+    (column, data_type); nested objects stay text.  Expressions are over
+    `_category_rows`.
+    kind ∈ integer | float | boolean | text.
+    """
+    kinds = kinds or {}
+    plain, flat = [], []
+    for name, dtype in _columns(conn, table):
+        if dtype in JSON_TYPES or kinds.get(name) == "json":
+            for k in _json_keys(conn, table, name, dtype, cat_col, category):
+                types = set(k["types"] or [])
+                expr = f"({_parsed(name)} ->> {_lit(k['key'])})"
+                if types == {"number"}:
+                    kind = "integer" if k["ints"] else "float"
+                    expr = f"{expr}::double precision"
+                elif types == {"boolean"}:
+                    kind, expr = "boolean", f"{expr}::boolean"
+                else:
+                    kind = "text"
+                flat.append((f"{name}{sep}{k['key']}", expr, kind, (name, dtype)))
+        elif dtype in NUMERIC_TYPES:
+            kind = "integer" if dtype in ("smallint", "integer", "bigint") else "float"
+            plain.append((name, _q(name), kind, None))
+        elif dtype == "boolean":
+            plain.append((name, _q(name), "boolean", None))
+        else:
+            plain.append((name, _q(name), "text", None))
+    return plain + flat
+
+
+def _top_values(rows) -> Dict[str, Dict[str, Any]]:
+    return {r["name"]: {"distinct": int(r["n_distinct"]), "top": r["top"] or {}}
+            for r in rows}
+
+def _text_stats(conn, rows: str, category: str,
+                cols: List[Tuple], top_k: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Distinct count and top-k values of every text entry, one grouped pass
+    for the plain columns and one `jsonb_each_text` pass per JSON column
+    instead of a subquery per entry.
+    """
+    ranked = (
+        "SELECT name, count(*) OVER (PARTITION BY name) AS n_distinct,"
+        " v, n, row_number() OVER (PARTITION BY name ORDER BY n DESC, v) AS rn"
+        " FROM (SELECT name, v, count(*) AS n FROM kv GROUP BY name, v) c"
+    )
+    final = (
+        "SELECT name, max(n_distinct) AS n_distinct,"
+        f" jsonb_object_agg(v, n) FILTER (WHERE rn <= {int(top_k)}) AS top"
+        f" FROM ({ranked}) r GROUP BY name"
+    )
+    stats: Dict[str, Dict[str, Any]] = {}
+
+    plain = [(name, expr) for name, expr, kind, src in cols if kind == "text" and src is None]
+    if plain:
+        values = ", ".join(f"({_lit(name)}, (t.{expr})::text)" for name, expr in plain)
+        stats.update(_top_values(conn.execute(text(
+            f"{rows}, kv AS (SELECT x.name, x.v FROM t"
+            f" CROSS JOIN LATERAL (VALUES {values}) AS x(name, v)"
+            f" WHERE x.v IS NOT NULL) {final}"
+        ), {"c": category}).mappings()))
+
+    by_source: Dict[Tuple[str, str], Dict[str, str]] = {}
+    for name, _, kind, src in cols:
+        if kind == "text" and src is not None:
+            by_source.setdefault(src, {})[name[len(src[0]) + 1:]] = name
+    for (col, _dtype), names in by_source.items():
+        doc = "t." + _parsed(col)
+        found = conn.execute(text(
+            f"{rows}, kv AS (SELECT e.key AS name, e.value AS v FROM t,"
+            f" jsonb_each_text(CASE WHEN jsonb_typeof({doc}) = 'object'"
+            f" THEN {doc} END) AS e(key, value)"
+            f" WHERE e.value IS NOT NULL) {final}"
+        ), {"c": category}).mappings()
+        for key, st in _top_values(found).items():
+            if key in names:                     # text-kind keys only
+                stats[names[key]] = st
+    return stats
+
+
+def profile_category_sql(
+    engine,
+    table: str,
+    category: str,
+    cat_col: str = "generated_category",
+    top_k: int = 5,
+) -> Dict[str, Any]:
+    """
+    Summary of one category computed inside Postgres: `percentile_cont`
+    for numbers and `avg(::int)` for booleans, in SELECTs of at most
+    `_MAX_TARGETS` aggregates, plus grouped distinct/top-k passes for
+    everything else (`_text_stats`).
+    Same layout as `summarize_category_with_llm(...)["summary"]`.
+    """
+    where = f"{_q(cat_col)} = :c"
+    with engine.connect() as conn:
+        kinds = _table_kinds(engine, table)
+        cols = [c for c in profile_columns(conn, table, cat_col, category, kinds=kinds)
+                if c[0] not in SKIP_COLUMNS]
+
+        batches: List[List[str]] = [["count(*) AS n_rows"]]
+        for i, (_, expr, kind, _src) in enumerate(cols):
+            if kind in ("integer", "float"):
+                targets = [
+                    f"count({expr}) AS c{i}_n",
+                    f"min({expr}) AS c{i}_min",
+                    f"max({expr}) AS c{i}_max",
+                    f"avg({expr}) AS c{i}_mean",
+                    f"percentile_cont(0.5) WITHIN GROUP (ORDER BY {expr}) AS c{i}_p50",
+                    f"percentile_cont(0.95) WITHIN GROUP (ORDER BY {expr}) AS c{i}_p95",
+                ]
+            elif kind == "boolean":
+                targets = [f"count({expr}) AS c{i}_n",
+                           f"avg(({expr})::int) AS c{i}_pct_true"]
+            else:
+                continue
+            if len(batches[-1]) + len(targets) > _MAX_TARGETS:
+                batches.append([])
+            batches[-1] += targets
+
+        rows = _category_rows(conn, table, where, cols)
+        row: Dict[str, Any] = {}
+        for selects in batches:
+            row.update(conn.execute(
+                text(f"{rows} SELECT {', '.join(selects)} FROM t"),
+                {"c": category},
+            ).mappings().one())
+        texts = _text_stats(conn, rows, category, cols, top_k)
+
+    summary: Dict[str, Any] = {"category": category, "n_rows": row["n_rows"], "columns": {}}
+    for i, (name, _, kind, _src) in enumerate(cols):
+        if kind in ("integer", "float", "boolean") and not row[f"c{i}_n"]:
+            summary["columns"][name] = {"all_null": True}
+        elif kind in ("integer", "float"):
+            summary["columns"][name] = {
+                "type": "numeric",
+                **{s: _py(row[f"c{i}_{s}"]) for s in ("min", "max", "mean", "p50", "p95")},
+            }
+        elif kind == "boolean":
+            summary["columns"][name] = {
+                "type": "boolean",
+                "pct_true": float(row[f"c{i}_pct_true"]),
+            }
+        elif name not in texts:
+            summary["columns"][name] = {"all_null": True}
+        else:
+            top = texts[name]["top"]
+            summary["columns"][name] = {
+                "type": "categorical",
+                "distinct": texts[name]["distinct"],
+                "top_values": dict(sorted(top.items(), key=lambda kv: (-kv[1], kv[0]))),
+            }
+    return summary
+
+
+def category_schema_sql(
+    engine,
+    table: str,
+    category: str,
+    cat_col: str = "generated_category",
+) -> Dict[str, str]:
+    """`build_category_schema` equivalent from the catalog and JSON keys only."""
+    with engine.connect() as conn:
+        exists = conn.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE {_q(cat_col)} = :c)"),
+            {"c": category},
+        ).scalar()
+        if not exists:
+            return {}
+        kinds = _table_kinds(engine, table)
+        return {name: kind for name, _, kind, _src in
+                profile_columns(conn, table, cat_col, category, sep=".", kinds=kinds)}
@@ -0,0 +1,116 @@
+import copy
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from utils.engine_registry import get_engine
+
+# ─────────────────────── chat session state backends ───────────────────────
+# Where `ChatSession.to_state()` dicts live between turns.  With the
+# Postgres backend any worker process can pick up any session.  A single
+# process needs no backend at all: SessionStore's own LRU/TTL map already
+# holds the live sessions.
+
+
+class InMemorySessionBackend:
+    """
+    Process-local dict for tests of the backend protocol; unbounded, so it
+    is never attached by `make_session_backend`.
+    """
+
+    def __init__(self):
+        self._states: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._states.get(session_id)
+        return copy.deepcopy(entry[0]) if entry else None
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._states[session_id] = (copy.deepcopy(state), time.time())
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def expire(self, idle_ttl: float) -> int:
+        cutoff = time.time() - idle_ttl
+        with self._lock:
+            old = [sid for sid, (_, ts) in self._states.items() if ts < cutoff]
+            for sid in old:
+                del self._states[sid]
+        return len(old)
+
+    def count(self) -> int:
+        return len(self._states)
+
+
+class PostgresSessionBackend:
+    """`chat_sessions` table in the app database, one JSONB row per session."""
+
+    def __init__(self, db_url: str, table: str = "chat_sessions"):
+        self.engine = get_engine(db_url)
+        self.table = table
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " session_id TEXT PRIMARY KEY,"
+                " state JSONB NOT NULL,"
+                " updated_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {table}_updated_at_idx ON {table} (updated_at)"
+            ))
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            return conn.execute(
+                text(f"SELECT state FROM {self.table} WHERE session_id = :s"),
+                {"s": session_id},
+            ).scalar()
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"INSERT INTO {self.table} (session_id, state) "
+                    "VALUES (:s, CAST(:st AS jsonb)) "
+                    "ON CONFLICT (session_id) DO UPDATE "
+                    "SET state = EXCLUDED.state, updated_at = now()"
+                ),
+                {"s": session_id, "st": json.dumps(state, default=str)},
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {self.table} WHERE session_id = :s"),
+                         {"s": session_id})
+
+    def expire(self, idle_ttl: float) -> int:
+        with self.engine.begin() as conn:
+            return conn.execute(
+                text(f"DELETE FROM {self.table} "
+                     "WHERE updated_at < now() - make_interval(secs => :ttl)"),
+                {"ttl": idle_ttl},
+            ).rowcount
+
+    def count(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT count(*) FROM {self.table}")).scalar_one()
+
+
+def make_session_backend(kind: str = "memory", db_url: Optional[str] = None):
+    """
+    `kind` is "memory" or "postgres".  "memory" returns None: sessions stay
+    in the SessionStore map, bounded by its max_sessions and idle TTL.
+    """
+    if kind == "postgres":
+        return PostgresSessionBackend(db_url)
+    if kind == "memory":
+        return None
+    raise ValueError(f"Unknown session backend: {kind}")
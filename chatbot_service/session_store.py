@@ -0,0 +1,163 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# ─────────────────────── bounded chat session store ───────────────────────
+# LRU + idle-TTL map of session_id → ChatSession.  Sessions only hold
+# per-user state (see ChatSession), so the store's footprint is bounded by
+# max_sessions × the per-session cap on conversation memory.
+#
+# With a `backend` (session_backends.py) the map is only a cache: every
+# turn reads the stored state, rehydrates the session if another worker
+# has written a newer revision, and writes the new state back.
+
+
+class SessionStore:
+    """
+    Args:
+        factory: Builds a new session object (e.g. `ChatSession(resources)`).
+        max_sessions: Least recently used sessions beyond this are dropped.
+        idle_ttl: Seconds without a request after which a session expires
+            (None = never).
+        backend: Optional shared state backend (load/save/delete/expire).
+        restore: Builds a session from a stored state dict; required with
+            a backend (e.g. `ChatSession.from_state`).
+        expire_every: Trim expired rows from the backend every N saves.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        max_sessions: int = 1000,
+        idle_ttl: Optional[float] = 1800.0,
+        backend=None,
+        restore: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        expire_every: int = 500,
+    ):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be >= 1")
+        if backend is not None and restore is None:
+            raise ValueError("a session backend needs a restore function")
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.backend = backend
+        self.restore = restore
+        self.expire_every = expire_every
+        self._saves = 0
+        self.rehydrated = 0
+        self._sessions: "OrderedDict[str, Tuple[Any, float, threading.Lock]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+
+    def _expire(self, now: float) -> None:
+        if not self.idle_ttl:
+            return
+        while self._sessions:
+            sid, (_, last, _) = next(iter(self._sessions.items()))
+            if now - last <= self.idle_ttl:
+                break
+            del self._sessions[sid]
+            self.evicted_ttl += 1
+
+    def acquire(self, session_id: str) -> Tuple[Any, threading.Lock]:
+        """Session for `session_id` (created if missing) and its turn lock."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.pop(session_id, None)
+            if entry is None:
+                entry = (self.factory(), now, threading.Lock())
+                self.created += 1
+            session, _, lock = entry
+            self._sessions[session_id] = (session, now, lock)      # most recent last
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted_lru += 1
+        return session, lock
+
+    def _replace(self, session_id: str, session: Any, lock: threading.Lock) -> None:
+        with self._lock:
+            self._sessions[session_id] = (session, time.monotonic(), lock)
+            self._sessions.move_to_end(session_id)
+
+    def _sync(self, session_id: str, session: Any, lock: threading.Lock) -> Any:
+        """Local copy if it matches the stored revision, else rehydrate."""
+        stored = self.backend.load(session_id)
+        if stored is None:
+            if not session.revision:          # brand new here and in the backend
+                return session
+            session = self.factory()          # expired or dropped elsewhere
+        elif stored["revision"] != session.revision:
+            session = self.restore(stored)
+            self.rehydrated += 1
+        else:
+            return session
+        self._replace(session_id, session, lock)
+        return session
+
+    def _commit(self, session_id: str, session: Any) -> None:
+        session.revision = uuid.uuid4().hex
+        self.backend.save(session_id, session.to_state())
+        self._saves += 1
+        if self.idle_ttl and self._saves % self.expire_every == 0:
+            self.backend.expire(self.idle_ttl)
+
+    def send(self, session_id: str, message: str) -> str:
+        """
+        Run one turn; turns of the same session are serialized within this
+        process (concurrent turns on different workers: last write wins).
+        """
+        session, lock = self.acquire(session_id)
+        with lock:
+            if self.backend is None:
+                return session.send(message)
+            session = self._sync(session_id, session, lock)
+            reply = session.send(message)
+            self._commit(session_id, session)
+            return reply
+
+    def stream(self, session_id: str, message: str) -> Iterator[Dict[str, Any]]:
+        """
+        `send` through `session.send_stream`.  The turn lock is held until
+        the generator finishes; a turn abandoned mid-stream (client gone)
+        is not saved to the backend.
+        """
+        session, lock = self.acquire(session_id)
+        with lock:
+            if self.backend is not None:
+                session = self._sync(session_id, session, lock)
+            yield from session.send_stream(message)
+            if self.backend is not None:
+                self._commit(session_id, session)
+
+    def drop(self, session_id: str) -> bool:
+        if self.backend is not None:
+            self.backend.delete(session_id)
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            sessions = [s for s, _, _ in self._sessions.values()]
+        approx = sum(s.approx_bytes() for s in sessions if hasattr(s, "approx_bytes"))
+        return {
+            "sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "idle_ttl": self.idle_ttl,
+            "created": self.created,
+            "evicted_lru": self.evicted_lru,
+            "evicted_ttl": self.evicted_ttl,
+            "approx_state_bytes": approx,
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "rehydrated": self.rehydrated,
+            "stored_sessions": self.backend.count() if self.backend else len(sessions),
+        }
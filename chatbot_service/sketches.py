@@ -0,0 +1,359 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from chatbot_service.helpers import _flatten_json_series
+from utils.engine_registry import get_engine
+from utils.table_catalog import column_kinds
+
+# ─────────────────────── streaming sketch profiler ───────────────────────
+# Bounded-memory alternative to `summarize_category_with_llm`'s stats for
+# categories too large to hold in pandas.  Every sketch has `merge`, so
+# shards profiled by separate workers combine into one profile.
+
+SKIP_COLUMNS = ("assigned_category", "geometry")
+# `column_kinds` → sketch kind; "json" columns are flattened instead
+_SKETCH_KINDS = {"integer": "numeric", "float": "numeric",
+                 "boolean": "boolean", "text": "categorical"}
+
+
+def _hash(values: pd.Series) -> np.ndarray:
+    """64-bit hashes, stable across processes (pandas' fixed SipHash key)."""
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+class HyperLogLog:
+    """Distinct-count sketch with 2**p one-byte registers (~1.04/√2**p error)."""
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add(self, values: pd.Series) -> None:
+        h = _hash(values)
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        w = h << np.uint64(self.p)
+        # leading zeros of w, in two exact 32-bit halves
+        hi = (w >> np.uint64(32)).astype(np.float64)
+        lo = (w & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        with np.errstate(divide="ignore"):
+            lz = np.where(hi > 0, 31 - np.floor(np.log2(hi)),
+                          np.where(lo > 0, 63 - np.floor(np.log2(lo)), 64))
+        rho = np.minimum(lz + 1, 64 - self.p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rho)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:                 # small-range correction
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """
+    KLL-style compactor stack: level h holds items of weight 2**h, and a
+    full level is sorted and every other item (random offset) promoted.
+    Rank error is roughly 1/k regardless of stream length.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 42):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                keep = level[-1:] if len(level) % 2 else level[:0]
+                pairs = level[: len(level) - len(keep)]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = keep
+            h += 1
+
+    def update(self, values: np.ndarray) -> None:
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=float)])
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return None
+        weights = np.concatenate([np.full(len(l), 2.0 ** h) for h, l in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cum = np.cumsum(weights[order])
+        i = int(np.searchsorted(cum, q * cum[-1], side="left"))
+        return float(items[order][min(i, len(items) - 1)])
+
+
+class HeavyHitters:
+    """
+    Misra–Gries frequent items with `capacity` counters.  Counts are exact
+    while the number of distinct values fits, lower bounds otherwise.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def update(self, counts: Mapping[Any, int]) -> None:
+        for v, c in counts.items():
+            self.counts[v] = self.counts.get(v, 0) + int(c)
+        if len(self.counts) > self.capacity:
+            cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = {v: c - cut for v, c in self.counts.items() if c > cut}
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        self.update(other.counts)
+        return self
+
+    def top(self, k: int) -> Dict[Any, int]:
+        return dict(sorted(self.counts.items(), key=lambda kv: (-kv[1], str(kv[0])))[:k])
+
+
+class ColumnSketch:
+    """
+    Per-column state.  The kind is given by the table's column kinds, or
+    fixed by the first non-null values (flattened JSON keys).  Distinct
+    values and heavy hitters are kept for every kind, so a column whose
+    shards disagree can be merged as categorical.
+    """
+
+    def __init__(self, kind: Optional[str] = None, k: int = 200,
+                 hll_p: int = 14, heavy_hitters: int = 256):
+        self.kind = kind
+        self.count = 0
+        self.n_numeric = 0
+        self.min = self.max = None
+        self.total = 0.0
+        self.trues = 0
+        self.quantiles = QuantileSketch(k) if kind == "numeric" else None
+        self._k = k
+        self.distinct = HyperLogLog(hll_p)
+        self.top = HeavyHitters(heavy_hitters)
+
+    def _init_kind(self, ser: pd.Series) -> None:
+        if ser.dtype.kind in "if":
+            self.kind = "numeric"
+            self.quantiles = QuantileSketch(self._k)
+        elif ser.dtype == bool or ser.isin([0, 1]).all():
+            self.kind = "boolean"
+        else:
+            self.kind = "categorical"
+
+    def _demote(self) -> None:
+        """Keep only the distinct/heavy-hitter state, as a categorical column."""
+        self.kind = "categorical"
+        self.quantiles = None
+        self.min = self.max = None
+        self.total, self.trues, self.n_numeric = 0.0, 0, 0
+
+    def update(self, ser: pd.Series) -> None:
+        ser = ser.dropna()
+        if ser.empty:
+            return
+        if self.kind is None:
+            self._init_kind(ser)
+        self.count += len(ser)
+        self.distinct.add(ser)
+        self.top.update(ser.astype(str).value_counts())
+        if self.kind == "numeric":
+            vals = pd.to_numeric(ser, errors="coerce").dropna().to_numpy(dtype=float)
+            if len(vals) < len(ser):         # non-numeric values: categorical from now on
+                self._demote()
+                return
+            self.min = vals.min() if self.min is None else min(self.min, vals.min())
+            self.max = vals.max() if self.max is None else max(self.max, vals.max())
+            self.total += float(vals.sum())
+            self.quantiles.update(vals)
+            self.n_numeric += len(vals)
+        elif self.kind == "boolean":
+            if not ser.isin([0, 1]).all():
+                self._demote()
+                return
+            self.trues += int(ser.astype(bool).sum())
+
+    def merge(self, other: "ColumnSketch") -> "ColumnSketch":
+        if other.kind is None:
+            return self
+        if self.kind is None:
+            self.__dict__.update(other.__dict__)
+            return self
+        if self.kind != other.kind:          # shards disagree: fall back to categorical
+            self._demote()
+            other._demote()
+        self.count += other.count
+        self.distinct.merge(other.distinct)
+        self.top.merge(other.top)
+        if self.kind == "numeric" and other.n_numeric:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+            self.total += other.total
+            self.n_numeric += other.n_numeric
+            self.quantiles.merge(other.quantiles)
+        elif self.kind == "boolean":
+            self.trues += other.trues
+        return self
+
+    def summary(self, top_k: int = 5) -> Dict[str, Any]:
+        if not self.count:
+            return {"all_null": True}
+        if self.kind == "numeric" and self.n_numeric:
+            return {
+                "type": "numeric",
+                "min": float(self.min),
+                "max": float(self.max),
+                "mean": self.total / self.n_numeric,
+                "p50": self.quantiles.quantile(.5),
+                "p95": self.quantiles.quantile(.95),
+            }
+        if self.kind == "boolean":
+            return {"type": "boolean", "pct_true": self.trues / self.count}
+        return {
+            "type": "categorical",
+            "distinct": self.distinct.estimate(),
+            "top_values": self.top.top(top_k),
+        }
+
+
+class CategoryProfile:
+    """
+    Mergeable profile of one category.  `summary()` has the same layout as
+    `summarize_category_with_llm(...)["summary"]`; distinct counts and
+    percentiles are sketch estimates.
+
+    `kinds` is the table's `column_kinds`, decided once and shared by
+    every chunk and shard: "json" columns are flattened, the others get
+    their sketch kind up front.
+    """
+
+    def __init__(self, category: str, kinds: Optional[Dict[str, str]] = None,
+                 **sketch_kw):
+        self.category = category
+        self.n_rows = 0
+        self.columns: Dict[str, ColumnSketch] = {}
+        self.kinds = kinds or {}
+        self._sketch_kw = sketch_kw
+
+    def _column(self, name: str) -> ColumnSketch:
+        if name not in self.columns:
+            kind = _SKETCH_KINDS.get(self.kinds.get(name))
+            self.columns[name] = ColumnSketch(kind, **self._sketch_kw)
+        return self.columns[name]
+
+    def _json_columns(self, chunk: pd.DataFrame) -> List[str]:
+        return [c for c in chunk.columns if self.kinds.get(c) == "json"]
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.n_rows += len(chunk)
+        json_cols = self._json_columns(chunk)
+        parts = [chunk.drop(columns=json_cols)]
+        parts += [_flatten_json_series(chunk[jc], jc) for jc in json_cols]
+        for part in parts:
+            for col in part.columns:
+                if col not in SKIP_COLUMNS:
+                    self._column(col).update(part[col])
+
+    def merge(self, other: "CategoryProfile") -> "CategoryProfile":
+        self.n_rows += other.n_rows
+        for name, sketch in other.columns.items():
+            self._column(name).merge(sketch)
+        return self
+
+    def summary(self, top_k: int = 5) -> Dict[str, Any]:
+        return {
+            "category": self.category,
+            "n_rows": self.n_rows,
+            "columns": {c: s.summary(top_k) for c, s in self.columns.items()},
+        }
+
+
+def profile_category_stream(
+    engine,
+    table: str,
+    category: str,
+    cat_col: str = "generated_category",
+    chunksize: int = 50_000,
+    shard: Optional[Tuple[int, int]] = None,
+    kinds: Optional[Dict[str, str]] = None,
+    **sketch_kw,
+) -> CategoryProfile:
+    """
+    Profile one category through a server-side cursor, one chunk at a time.
+    `shard=(i, n)` restricts the scan to heap pages with block number ≡ i
+    (mod n), so n workers cover the category exactly once.  `kinds`
+    defaults to the table's `column_kinds`.
+    """
+    if kinds is None:
+        kinds = column_kinds(engine, table)
+    sql = f'SELECT * FROM {table} WHERE "{cat_col}" = :c'
+    params: Dict[str, Any] = {"c": category}
+    if shard is not None:
+        sql += " AND ((ctid::text::point)[0]::bigint % :n) = :i"
+        params.update(i=shard[0], n=shard[1])
+
+    profile = CategoryProfile(category, kinds, **sketch_kw)
+    with engine.connect().execution_options(stream_results=True) as conn:
+        for chunk in pd.read_sql(text(sql), conn, params=params, chunksize=chunksize):
+            profile.update(chunk)
+    return profile
+
+
+def _profile_shard(args) -> CategoryProfile:
+    db_url, table, category, cat_col, chunksize, shard, kinds, sketch_kw = args
+    return profile_category_stream(get_engine(db_url), table, category, cat_col,
+                                   chunksize, shard, kinds, **sketch_kw)
+
+
+def profile_category_parallel(
+    db_url: str,
+    table: str,
+    category: str,
+    cat_col: str = "generated_category",
+    n_workers: int = 4,
+    chunksize: int = 50_000,
+    **sketch_kw,
+) -> CategoryProfile:
+    """
+    Profile `n_workers` disjoint shards in a process pool and merge them;
+    column kinds are decided once here and shared by every shard.
+    """
+    kinds = column_kinds(get_engine(db_url), table)
+    jobs = [(db_url, table, category, cat_col, chunksize, (i, n_workers), kinds, sketch_kw)
+            for i in range(n_workers)]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        parts = list(pool.map(_profile_shard, jobs))
+    return reduce(CategoryProfile.merge, parts)
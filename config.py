@@ -8,3 +8,58 @@ DB_URL  = os.getenv(
 TABLE   = "nodes_categorized"
 CAT_COL = "generated_category"
 MODEL_STR = os.getenv("OPENAI_MODEL", "openai:gpt-4o")
+
+# local fallback for the row-embedding cache when Postgres is unreachable
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite")
+
+# embedding scheduler: texts per request and max in-flight requests
+EMBED_BATCH_SIZE      = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "8"))
+
+# fit-on-sample / propagate-to-all labelling
+CLUSTER_MODEL_PATH = os.getenv("CLUSTER_MODEL_PATH", ".cache/hdbscan_clusterer.joblib")
+LABEL_CHUNK_SIZE   = int(os.getenv("LABEL_CHUNK_SIZE", "5000"))
+
+# rebuild swap: how long the renames may wait for the table lock before
+# backing off, and how often they are retried
+SWAP_LOCK_TIMEOUT_MS = int(os.getenv("SWAP_LOCK_TIMEOUT_MS", "2000"))
+SWAP_MAX_RETRIES     = int(os.getenv("SWAP_MAX_RETRIES", "5"))
+
+# HDBSCAN: PCA dimension for the float32 path (0 = cluster the full
+# embeddings) and core-distance worker count (-1 = every core)
+HDBSCAN_REDUCE_DIM       = int(os.getenv("HDBSCAN_REDUCE_DIM", "0"))
+HDBSCAN_CORE_DIST_N_JOBS = int(os.getenv("HDBSCAN_CORE_DIST_N_JOBS", "-1"))
+
+# partitioned HDBSCAN (cluster_hdbscan_gemini): k-means shards (0/1 = one
+# fit), rows sampled to fit k-means, relative halo of boundary rows each
+# shard also sees, and the centroid distance (unit vectors) under which
+# clusters of different shards are merged
+HDBSCAN_PARTITIONS       = int(os.getenv("HDBSCAN_PARTITIONS", "0"))
+HDBSCAN_PARTITION_SAMPLE = int(os.getenv("HDBSCAN_PARTITION_SAMPLE", "20000"))
+HDBSCAN_PARTITION_HALO   = float(os.getenv("HDBSCAN_PARTITION_HALO", "0.05"))
+HDBSCAN_MERGE_DISTANCE   = float(os.getenv("HDBSCAN_MERGE_DISTANCE", "0.3"))
+
+# concurrent LLM cluster naming
+NAMING_MAX_CONCURRENCY = int(os.getenv("NAMING_MAX_CONCURRENCY", "8"))
+NAMING_TIMEOUT         = float(os.getenv("NAMING_TIMEOUT", "60"))
+NAMING_TOKEN_BUDGET    = int(os.getenv("NAMING_TOKEN_BUDGET", "1500"))
+NAMING_CLUSTERS_PER_CALL = int(os.getenv("NAMING_CLUSTERS_PER_CALL", "1"))
+
+# shared LLM response cache: "sqlite" (local file), "postgres" or "off"
+LLM_CACHE_BACKEND     = os.getenv("LLM_CACHE_BACKEND", "sqlite")
+LLM_CACHE_PATH        = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_TTL         = float(os.getenv("LLM_CACHE_TTL", "0")) or None   # seconds
+
+# /chat session store: LRU cap, idle expiry and per-session history length
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "1000"))
+CHAT_SESSION_TTL  = float(os.getenv("CHAT_SESSION_TTL", "1800")) or None   # seconds
+CHAT_MEMORY_TURNS = int(os.getenv("CHAT_MEMORY_TURNS", "10"))
+# where /chat session state lives between turns: "memory" (the bounded
+# in-process session map only) or "postgres" (shared, needed for more
+# than one uvicorn worker)
+CHAT_SESSION_BACKEND = os.getenv("CHAT_SESSION_BACKEND", "memory")
+
+# background pipeline jobs (/trigger): local job table and pool size
+JOB_DB_PATH     = os.getenv("JOB_DB_PATH", ".cache/jobs.sqlite")
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "1"))
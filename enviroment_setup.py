@@ -45,6 +45,8 @@ def setup_environment():
         "user": os.getenv("DB_USER", "devuser"),
         "password": os.getenv("DB_PASSWORD", "devpassword"),
         "dbname": os.getenv("DB_NAME", "devdb"),
+        "pool_min": int(os.getenv("DB_POOL_MIN", "1")),
+        "pool_max": int(os.getenv("DB_POOL_MAX", "10")),
     }
 
     # Set log level
@@ -1,8 +1,10 @@
 import asyncio
+import json
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
-from typing import List, Dict
+from fastapi.responses import StreamingResponse
+from typing import Any, List, Dict
 from agent_factory import AgentFactory
 from pydantic import BaseModel
 from enviroment_setup import setup_environment
@@ -15,24 +17,26 @@ config = setup_environment()
 logger = logging.getLogger(__name__)
 
 try:
-    from utils.database_connection import PostgresDB
+    from utils.async_database import AsyncPostgresDB
 except ImportError:
     # This fallback is just for development ease if the file is missing,
     # but in production, this should not happen.
     raise ImportError(
-        "database_connection.py not found. Please ensure it exists with the PostgresDB class."
+        "async_database.py not found (or asyncpg is not installed). Please ensure it exists with the AsyncPostgresDB class."
     )
 
 # Use environment variables for database configuration
 DB_CONFIG = config["db_config"]
 
 # Global instance of the database manager
-db = PostgresDB(
+db = AsyncPostgresDB(
     dbname=DB_CONFIG["dbname"],
     user=DB_CONFIG["user"],
     password=DB_CONFIG["password"],
     host=DB_CONFIG["host"],
     port=DB_CONFIG["port"],
+    min_size=DB_CONFIG["pool_min"],
+    max_size=DB_CONFIG["pool_max"],
 )
 
 
@@ -54,7 +58,7 @@ async def lifespan(app: FastAPI):
         )
 
     # Connect to database
-    if db.connect():
+    if await db.connect():
         logger.info("Application startup: Successfully connected to the database")
     else:
         logger.error("Application startup: Failed to connect to the database")
@@ -62,7 +66,7 @@ async def lifespan(app: FastAPI):
     yield
 
     # Disconnect from database
-    db.disconnect()
+    await db.disconnect()
     logger.info("Application shutdown: Disconnected from the database")
 
 
@@ -90,7 +94,7 @@ app.add_middleware(
 
 # Dependency to get the DB instance and ensure it's connected for operations
 def get_database_instance():
-    if not db.is_connected:  # Using the property from PostgresDB class
+    if not db.is_connected:  # Using the property from AsyncPostgresDB class
         raise HTTPException(
             status_code=503,  # Service Unavailable
             detail="Database is not connected. Please use the POST /connect endpoint first.",
@@ -105,7 +109,7 @@ async def connect_to_db() -> Dict[str, str]:
     """
     if db.is_connected:
         return {"status": "success", "message": "Already connected to the database."}
-    if db.connect():
+    if await db.connect():
         return {
             "status": "success",
             "message": "Successfully connected to the database.",
@@ -134,7 +138,7 @@ async def disconnect_from_db() -> Dict[str, str]:
             "message": "Already disconnected from the database.",
         }
     if (
-        db.disconnect()
+        await db.disconnect()
     ):  # disconnect should ideally always return True or handle its errors.
         return {
             "status": "success",
@@ -153,12 +157,17 @@ async def disconnect_from_db() -> Dict[str, str]:
     tags=["Connection Management"],
     summary="Check database connection status",
 )
-async def get_connection_status() -> Dict[str, str]:
+async def get_connection_status() -> Dict[str, Any]:
     """
-    Checks and returns the current connection status to the database.
+    Checks and returns the current connection status to the database,
+    with connection pool statistics.
     """
     if db.is_connected:
-        return {"status": "connected", "message": "Database is currently connected."}
+        return {
+            "status": "connected",
+            "message": "Database is currently connected.",
+            "pool": db.pool_stats(),
+        }
     else:
         return {"status": "disconnected", "message": "Database is not connected."}
 
@@ -169,12 +178,12 @@ async def get_connection_status() -> Dict[str, str]:
     tags=["Database Operations"],
     summary="Get all table names",
 )
-async def get_all_tables(db_instance: PostgresDB = Depends(get_database_instance)):
+async def get_all_tables(db_instance: AsyncPostgresDB = Depends(get_database_instance)):
     """
     Retrieves a list of all user-defined tables in the connected database.
     Requires an active database connection.
     """
-    tables = db_instance.get_all_tables()
+    tables = await db_instance.get_all_tables()
     # get_all_tables returns [] on error or if not connected,
     # but the dependency `get_database_instance` should catch "not connected".
     return tables
@@ -187,7 +196,7 @@ async def get_all_tables(db_instance: PostgresDB = Depends(get_database_instance
     summary="Get all columns for a table",
 )
 async def get_all_columns(
-    table_name: str, db_instance: PostgresDB = Depends(get_database_instance)
+    table_name: str, db_instance: AsyncPostgresDB = Depends(get_database_instance)
 ):
     """
     Retrieves a list of all column names for a specified table.
@@ -196,9 +205,9 @@ async def get_all_columns(
     if not table_name.strip():
         raise HTTPException(status_code=400, detail="Table name cannot be empty.")
 
-    columns = db_instance.get_table_columns(table_name)
+    columns = await db_instance.get_table_columns(table_name)
     if (
-        not columns and table_name not in db_instance.get_all_tables()
+        not columns and table_name not in await db_instance.get_all_tables()
     ):  # Additional check if columns list is empty
         # This check helps differentiate an empty table/no columns from a non-existent table.
         # Note: db_instance.get_table_columns itself already prints if table doesn't exist.
@@ -215,38 +224,42 @@ class QueryRequest(BaseModel):
     query: str
 
 
+def get_agent(agent_type: str):
+    """
+    Validates the API key for `agent_type` and returns its cached agent,
+    creating it on first use.
+    """
+    # Validate API keys based on agent type
+    if agent_type.lower() == "example" and not config["openai_api_key"]:
+        raise HTTPException(
+            status_code=400,
+            detail="OpenAI API key not configured. This agent requires an OpenAI API key.",
+        )
+    elif agent_type.lower() == "data access" and not config["google_api_key"]:
+        raise HTTPException(
+            status_code=400,
+            detail="Google API key not configured. This agent requires a Google API key.",
+        )
+
+    # Get or create the agent instance
+    if agent_type not in agent_instances:
+        try:
+            agent_instances[agent_type] = AgentFactory.create_agent(agent_type)
+            logger.info(f"Created new agent instance of type: {agent_type}")
+        except ValueError as e:
+            logger.error(f"Invalid agent type requested: {agent_type}")
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return agent_instances[agent_type]
+
+
 @app.post("/query", tags=["Agent Operations"], summary="Process a query using an agent")
 async def process_query(request: QueryRequest):
     """
     Processes a query using the specified agent type.
     """
     try:
-        # Validate API keys based on agent type
-        if request.agent_type.lower() == "example" and not config["openai_api_key"]:
-            raise HTTPException(
-                status_code=400,
-                detail="OpenAI API key not configured. This agent requires an OpenAI API key.",
-            )
-        elif (
-            request.agent_type.lower() == "data access" and not config["google_api_key"]
-        ):
-            raise HTTPException(
-                status_code=400,
-                detail="Google API key not configured. This agent requires a Google API key.",
-            )
-
-        # Get or create the agent instance
-        if request.agent_type not in agent_instances:
-            try:
-                agent_instances[request.agent_type] = AgentFactory.create_agent(
-                    request.agent_type
-                )
-                logger.info(f"Created new agent instance of type: {request.agent_type}")
-            except ValueError as e:
-                logger.error(f"Invalid agent type requested: {request.agent_type}")
-                raise HTTPException(status_code=400, detail=str(e))
-
-        agent = agent_instances[request.agent_type]
+        agent = get_agent(request.agent_type)
 
         # Process the query with the agent
         logger.info(
@@ -282,6 +295,35 @@ async def process_query(request: QueryRequest):
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
 
+@app.post(
+    "/query/stream",
+    tags=["Agent Operations"],
+    summary="Process a query using an agent, streaming tokens and steps",
+)
+async def process_query_stream(request: QueryRequest):
+    """
+    Same as /query, but returns newline-delimited JSON events as the agent
+    produces them: "token" (model output), "tool_call" / "tool_result"
+    (agent steps) and a final "done" with the complete answer.  Errors
+    after the stream has started arrive as an "error" event.
+    """
+    agent = get_agent(request.agent_type)
+    logger.info(
+        f"Streaming query with {request.agent_type} agent: {request.query}"
+    )
+
+    def events():
+        try:
+            for event in agent.llm_events(request.query):
+                yield json.dumps(event, default=str) + "\n"
+        except Exception as e:
+            logger.error(f"Error during agent streaming: {str(e)}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+    # a sync generator: Starlette runs each step in its threadpool
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 @app.get("/")
 async def root():
     return {
@@ -1,3 +1,4 @@
 from .database_connection import PostgresDB
+from .embedding_cache import EmbeddingCache
 
-__all__ = ["PostgresDB"]
+__all__ = ["PostgresDB", "EmbeddingCache"]
@@ -0,0 +1,205 @@
+import asyncpg
+
+
+class AsyncPostgresDB:
+    """
+    asyncio counterpart of `PostgresDB` built on an asyncpg pool, for
+    `async def` endpoints: queries await the network instead of blocking
+    the event loop.  Same `get_all_tables` / `get_table_columns` API, as
+    coroutines.
+    """
+
+    def __init__(
+        self,
+        dbname="devdb",
+        user="devuser",
+        password="devpassword",
+        host="localhost",
+        port="5433",
+        min_size=1,
+        max_size=10,
+        command_timeout=30.0,
+        max_inactive_connection_lifetime=300.0,
+    ):
+        """
+        Initializes the AsyncPostgresDB object with database connection parameters.
+
+        Args:
+            dbname (str): The name of the database.
+            user (str): The username for database authentication.
+            password (str): The password for database authentication.
+            host (str): The host address of the database server.
+            port (str): The port number for the database server.
+            min_size (int): Connections opened up front and kept in the pool.
+            max_size (int): Upper bound on open connections.
+            command_timeout (float): Per-query timeout in seconds.
+            max_inactive_connection_lifetime (float): Idle connections older
+                than this are closed by the pool.
+        """
+        self.dbname = dbname
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.min_size = min_size
+        self.max_size = max_size
+        self.command_timeout = command_timeout
+        self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
+        self.pool = None
+
+    async def connect(self):
+        """
+        Opens the connection pool.
+
+        Returns:
+            bool: True if connection is successful, False otherwise.
+        """
+        if self.pool:
+            print("Already connected to the database.")
+            return True
+        try:
+            print(
+                f"Attempting to connect to database: {self.dbname}@{self.host}:{self.port} with user {self.user}"
+            )
+            self.pool = await asyncpg.create_pool(
+                database=self.dbname,
+                user=self.user,
+                password=self.password,
+                host=self.host,
+                port=int(self.port),
+                min_size=self.min_size,
+                max_size=self.max_size,
+                command_timeout=self.command_timeout,
+                max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+            )
+            print(
+                f"Successfully connected to the database (pool {self.min_size}-{self.max_size})."
+            )
+            return True
+        except (OSError, asyncpg.PostgresError) as e:
+            print(f"Error connecting to the database: {e}")
+            self.pool = None
+            return False
+        except Exception as e:
+            print(f"An unexpected error occurred during connection: {e}")
+            self.pool = None
+            return False
+
+    async def disconnect(self):
+        """
+        Closes every pooled connection.
+
+        Returns:
+            bool: True if disconnection is successful or if not connected.
+        """
+        if not self.pool:
+            print("No active connection to disconnect.")
+            return True
+        try:
+            await self.pool.close()
+            print("Database connection pool closed.")
+        except Exception as e:
+            print(f"Error closing connection pool: {e}")
+        self.pool = None
+        return True
+
+    def pool_stats(self):
+        """
+        Pool counters for monitoring.
+
+        Returns:
+            dict: min/max size and open/idle/in-use connections.
+        """
+        if not self.pool:
+            return {"min_size": self.min_size, "max_size": self.max_size,
+                    "open": 0, "idle": 0, "in_use": 0}
+        size, idle = self.pool.get_size(), self.pool.get_idle_size()
+        return {"min_size": self.min_size, "max_size": self.max_size,
+                "open": size, "idle": idle, "in_use": size - idle}
+
+    async def get_all_tables(self):
+        """
+        Retrieves a list of all user-defined tables in the connected database.
+
+        Returns:
+            list: A list of table names. Returns an empty list if no tables
+                  are found or if an error occurs or not connected.
+        """
+        if not self.pool:
+            print("Not connected to the database. Please connect first.")
+            return []
+        try:
+            rows = await self.pool.fetch("""
+                SELECT tablename
+                FROM pg_catalog.pg_tables
+                WHERE schemaname != 'pg_catalog' AND schemaname != 'information_schema';
+            """)
+            return [r[0] for r in rows]
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            print(f"Error fetching tables: {e}")
+            return []
+        except Exception as e:
+            print(f"An unexpected error occurred while fetching tables: {e}")
+            return []
+
+    async def get_table_columns(self, table_name):
+        """
+        Retrieves a list of all column names for a specified table.
+
+        Args:
+            table_name (str): The name of the table.
+
+        Returns:
+            list: A list of column names. Returns an empty list if the table
+                  does not exist, has no columns, or if an error occurs or not connected.
+        """
+        if not self.pool:
+            print("Not connected to the database. Please connect first.")
+            return []
+        if not table_name or not isinstance(table_name, str):
+            print("Invalid table name provided.")
+            return []
+        try:
+            async with self.pool.acquire() as conn:
+                return await self._table_columns(conn, table_name)
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            print(f"Error fetching columns for table '{table_name}': {e}")
+            return []
+        except Exception as e:
+            print(
+                f"An unexpected error occurred while fetching columns for table '{table_name}': {e}"
+            )
+            return []
+
+    async def _table_columns(self, conn, table_name):
+        # both queries on one connection: one pool checkout per request
+        exists = await conn.fetchval(
+            """
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM information_schema.tables
+                    WHERE table_name = $1 AND table_schema NOT IN ('pg_catalog', 'information_schema')
+                );
+            """,
+            table_name,
+        )
+        if not exists:
+            print(
+                f"Table '{table_name}' does not exist in user schemas or query failed."
+            )
+            return []
+        rows = await conn.fetch(
+            """
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name = $1
+                ORDER BY ordinal_position;
+            """,
+            table_name,
+        )
+        return [r[0] for r in rows]
+
+    @property
+    def is_connected(self):
+        """Simple property to check connection status."""
+        return self.pool is not None
@@ -0,0 +1,76 @@
+import asyncio
+import queue
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def run_blocking(make_coro: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run the coroutine built by `make_coro` to completion from sync code.
+    Inside an already running event loop (FastAPI, Jupyter) it is run on a
+    fresh loop in a helper thread instead of failing.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(make_coro())
+
+    out: dict = {}
+
+    def _worker():
+        try:
+            out["value"] = asyncio.run(make_coro())
+        except BaseException as e:          # re-raised in caller thread
+            out["error"] = e
+
+    t = threading.Thread(target=_worker)
+    t.start()
+    t.join()
+    if "error" in out:
+        raise out["error"]
+    return out["value"]
+
+
+def iter_blocking(make_agen: Callable[[], AsyncIterator[T]]) -> Iterator[T]:
+    """
+    Iterate the async generator built by `make_agen` from sync code.  It
+    runs on a fresh loop in a helper thread and every item is handed over
+    as soon as it is produced; closing the iterator early cancels it.
+    """
+    items: queue.Queue = queue.Queue()
+
+    async def _drain():
+        try:
+            async for item in make_agen():
+                items.put(("item", item))
+        except asyncio.CancelledError:
+            pass
+        except BaseException as e:          # re-raised in caller thread
+            items.put(("error", e))
+        items.put(("done", None))
+
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(_drain())
+
+    def _worker():
+        loop.run_until_complete(task)
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+    t = threading.Thread(target=_worker, daemon=True)
+    t.start()
+    try:
+        while True:
+            kind, value = items.get()
+            if kind == "item":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                return
+    finally:
+        if not task.done():
+            loop.call_soon_threadsafe(task.cancel)
+        t.join()
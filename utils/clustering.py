@@ -0,0 +1,240 @@
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List
+
+import hdbscan
+import joblib
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import PCA
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import normalize
+
+from config import (
+    HDBSCAN_REDUCE_DIM, HDBSCAN_CORE_DIST_N_JOBS,
+    HDBSCAN_PARTITIONS, HDBSCAN_PARTITION_SAMPLE, HDBSCAN_PARTITION_HALO,
+    HDBSCAN_MERGE_DISTANCE,
+)
+
+# ─────────────────────── embedding reduction & HDBSCAN ───────────────────────
+# Pure numeric helpers with no import-time side effects (no LLM client, no
+# database), so spawned pool workers can import this module cheaply.
+
+
+def reduce_embeddings(
+    embeddings: np.ndarray,
+    n_components: int = HDBSCAN_REDUCE_DIM,
+    seed: int = 42,
+) -> tuple[np.ndarray, PCA | None]:
+    """
+    Project L2‑normalized embeddings onto their top `n_components`
+    principal directions (randomized PCA) as float32, re‑normalized so
+    'euclidean' still ranks like cosine.  Returns the reduced vectors and
+    the fitted projection (None when `n_components` is 0 or not below
+    the input dimension, in which case the vectors are only cast).
+    """
+    X = np.asarray(embeddings, dtype=np.float32)
+    if not n_components or n_components >= min(X.shape):
+        return X, None
+    pca = PCA(n_components=n_components, svd_solver="randomized", random_state=seed)
+    return apply_reducer(pca.fit(X), X), pca
+
+
+def apply_reducer(reducer: PCA | None, embeddings: np.ndarray) -> np.ndarray:
+    """Project new rows with a reducer from `reduce_embeddings`."""
+    X = np.asarray(embeddings, dtype=np.float32)
+    if reducer is None:
+        return X
+    return normalize(reducer.transform(X)).astype(np.float32, copy=False)
+
+
+def fit_hdbscan(
+    embeddings: np.ndarray,
+    min_cluster_size: int = 15,
+    min_samples: int | None = None,
+    metric: str = "euclidean",
+    prediction_data: bool = False,     # needed for approximate_predict later
+    core_dist_n_jobs: int = HDBSCAN_CORE_DIST_N_JOBS,   # -1 = every core
+) -> hdbscan.HDBSCAN:
+    return hdbscan.HDBSCAN(
+        min_cluster_size=min_cluster_size,
+        min_samples=min_samples,
+        metric=metric,
+        prediction_data=prediction_data,
+        core_dist_n_jobs=core_dist_n_jobs,
+    ).fit(embeddings)
+
+
+# ---------------- partitioned HDBSCAN for tables too big for one fit ----
+_ASSIGN_BLOCK = 65_536     # rows per k‑means assignment block
+
+def _fit_shard(args) -> np.ndarray:
+    X, min_cluster_size, min_samples, metric = args
+    if len(X) < max(min_cluster_size, 2):
+        return np.full(len(X), -1)
+    # one core per shard: the pool already runs a shard per process
+    return fit_hdbscan(X, min_cluster_size, min_samples, metric,
+                       core_dist_n_jobs=1).labels_
+
+
+def _merge_close_clusters(
+    centroids: np.ndarray,
+    sizes: np.ndarray,
+    shard_of: np.ndarray,
+    max_distance: float,
+) -> np.ndarray:
+    """
+    Merge clusters cut apart by shard boundaries; returns a root id per
+    cluster.  Groups that are each other's nearest neighbour, lie within
+    `max_distance` (L2‑normalized centroids) and share no shard are merged,
+    then the merged centroids are recomputed and the search repeats.
+    Centroid linkage on mutual pairs only, so – unlike single‑link
+    union – a chain of near neighbours never folds distinct clusters into
+    one.
+    """
+    root = np.arange(len(centroids))
+    if len(centroids) < 2 or max_distance <= 0:
+        return root
+    sums = centroids * sizes[:, None]
+    weights = sizes.astype(float)
+    members = {i: [i] for i in range(len(centroids))}
+    shards = {i: {int(shard_of[i])} for i in range(len(centroids))}
+    while len(members) > 1:
+        ids = np.fromiter(members, dtype=np.intp)
+        cents = normalize(sums[ids] / weights[ids, None])
+        dists, nbrs = NearestNeighbors(radius=max_distance).fit(cents).radius_neighbors(cents)
+        nearest = np.full(len(ids), -1)
+        for a, (d, js) in enumerate(zip(dists, nbrs)):
+            for b in js[np.argsort(d)]:
+                if b != a and shards[ids[a]].isdisjoint(shards[ids[b]]):
+                    nearest[a] = b
+                    break
+        pairs = [(a, b) for a, b in enumerate(nearest) if b > a and nearest[b] == a]
+        if not pairs:
+            break
+        for a, b in pairs:
+            keep, gone = ids[a], ids[b]
+            sums[keep] += sums[gone]
+            weights[keep] += weights[gone]
+            shards[keep] |= shards.pop(gone)
+            members[keep] += members.pop(gone)
+    for r, group in members.items():
+        root[group] = r
+    return root
+
+
+def cluster_partitioned(
+    embeddings: np.ndarray,
+    n_partitions: int = HDBSCAN_PARTITIONS,
+    min_cluster_size: int = 15,
+    min_samples: int | None = None,
+    metric: str = "euclidean",
+    sample_size: int = HDBSCAN_PARTITION_SAMPLE,
+    merge_distance: float = HDBSCAN_MERGE_DISTANCE,
+    halo: float = HDBSCAN_PARTITION_HALO,
+    n_workers: int | None = None,
+    seed: int = 42,
+) -> np.ndarray:
+    """
+    HDBSCAN labels for `embeddings` without one fit over every row.
+
+    1) mini‑batch k‑means fitted on `sample_size` rows splits the data
+       into `n_partitions` coarse shards (nearest centre);
+    2) each shard is clustered independently in a process pool, together
+       with a halo of neighbouring rows at most `halo` (relative) farther
+       from its centre than from their own, so densities near the shard
+       boundary are not underestimated; a row's label comes from its own
+       shard only;
+    3) clusters of different shards that are mutual nearest neighbours
+       within `merge_distance` (euclidean on unit vectors) are merged,
+       repeatedly, so a group cut by shard boundaries gets one label
+       (see `_merge_close_clusters`).
+
+    Labels are globally unique, 0…k‑1 ordered by first row, ‑1 = noise –
+    the same layout as `HDBSCAN.labels_`.
+    """
+    X = np.asarray(embeddings)
+    n_partitions = max(1, min(n_partitions, len(X) // max(min_cluster_size, 1) or 1))
+    rng = np.random.default_rng(seed)
+    sample = X[rng.choice(len(X), min(sample_size, len(X)), replace=False)]
+    kmeans = MiniBatchKMeans(n_clusters=n_partitions, random_state=seed, n_init=3)
+    kmeans.fit(sample)
+
+    # nearest centre + halo membership, a block of rows at a time so no
+    # n × n_partitions distance matrix is ever held
+    shard = np.empty(len(X), dtype=np.intp)
+    blocks: List[List[np.ndarray]] = [[] for _ in range(n_partitions)]
+    for start in range(0, len(X), _ASSIGN_BLOCK):
+        dist = kmeans.transform(X[start:start + _ASSIGN_BLOCK])
+        shard[start:start + len(dist)] = dist.argmin(axis=1)
+        rows, cols = np.nonzero(dist <= dist.min(axis=1, keepdims=True) * (1 + halo))
+        rows = rows[np.argsort(cols, kind="stable")] + start
+        bounds = np.cumsum(np.bincount(cols, minlength=n_partitions))[:-1]
+        for k, idx in enumerate(np.split(rows, bounds)):
+            blocks[k].append(idx)
+    members = [np.concatenate(b) for b in blocks]                         # own + halo
+    order = sorted(range(n_partitions), key=lambda k: -len(members[k]))  # big first
+
+    def job(k: int):
+        return X[members[k]], min_cluster_size, min_samples, metric
+
+    # shard copies are built as they are sent, at most n_workers in flight
+    n_workers = min(n_workers or os.cpu_count() or 1, n_partitions)
+    local: Dict[int, np.ndarray] = {}
+    if n_workers > 1:
+        # spawn, not fork: the caller may already run gRPC/DB threads;
+        # workers only import this module
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            todo = iter(order)
+            pending = {pool.submit(_fit_shard, job(k)): k
+                       for k in itertools.islice(todo, n_workers)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    local[pending.pop(future)] = future.result()
+                    k = next(todo, None)
+                    if k is not None:
+                        pending[pool.submit(_fit_shard, job(k))] = k
+    else:
+        for k in order:
+            local[k] = _fit_shard(job(k))
+
+    # local → provisional global ids, one centroid per shard cluster
+    labels = np.full(len(X), -1)
+    centroids, sizes, shard_of = [], [], []
+    for k in range(n_partitions):
+        own = shard[members[k]] == k
+        for c in np.unique(local[k][own & (local[k] >= 0)]):
+            in_c = local[k] == c
+            labels[members[k][own & in_c]] = len(centroids)
+            centroids.append(X[members[k][in_c]].mean(axis=0))   # incl. halo rows
+            sizes.append(int(in_c.sum()))
+            shard_of.append(k)
+    if not centroids:
+        return labels
+
+    root = _merge_close_clusters(np.array(centroids), np.array(sizes),
+                                 np.array(shard_of), merge_distance)
+    labels = np.where(labels >= 0, root[np.maximum(labels, 0)], -1)
+    # renumber 0…k‑1 in order of first appearance
+    clustered = labels >= 0
+    _, first, inverse = np.unique(labels[clustered], return_index=True, return_inverse=True)
+    rank = np.argsort(np.argsort(first))
+    labels[clustered] = rank[inverse]
+    return labels
+
+
+# ---------------- propagate workers ----------
+_WORKER_CLUSTERER = None
+
+def init_predict_worker(model_path: str) -> None:
+    """Pool initializer: load the saved clusterer once per worker process."""
+    global _WORKER_CLUSTERER
+    _WORKER_CLUSTERER = joblib.load(model_path)["clusterer"]
+
+def predict_block(embeddings: np.ndarray) -> np.ndarray:
+    labels, _strengths = hdbscan.approximate_predict(_WORKER_CLUSTERER, embeddings)
+    return labels
@@ -1,4 +1,9 @@
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import pool as pg_pool
 
 
 class PostgresDB:
@@ -6,6 +11,15 @@ class PostgresDB:
     A class to interact with a PostgreSQL database using psycopg2.
     It provides functionalities to connect, disconnect, list all tables,
     and list columns of a specific table.
+
+    Connections come from a thread-safe pool; every query runs on its own
+    cursor on a connection checked out for that call only, so concurrent
+    requests never share a cursor and a failed query only affects the
+    connection it ran on.
+
+    main.py now serves its endpoints from `utils.async_database.AsyncPostgresDB`;
+    this blocking class stays for synchronous callers (it is exported from
+    `utils`) and as the "before" side of benchmarks/bench_catalog_endpoints.py.
     """
 
     def __init__(
@@ -15,6 +29,10 @@ class PostgresDB:
         password="devpassword",
         host="localhost",
         port="5433",
+        min_size=1,
+        max_size=10,
+        checkout_timeout=30.0,
+        health_check_interval=30.0,
     ):
         """
         Initializes the PostgresDB object with database connection parameters.
@@ -25,25 +43,53 @@ class PostgresDB:
             password (str): The password for database authentication.
             host (str): The host address of the database server.
             port (str): The port number for the database server.
+            min_size (int): Connections opened up front.
+            max_size (int): Upper bound on open connections.  Connections
+                opened beyond `min_size` stay open when returned, so a busy
+                pool does not reconnect on every checkout.
+            checkout_timeout (float): Seconds to wait for a free connection.
+            health_check_interval (float): Connections idle longer than this
+                are pinged with `SELECT 1` on checkout.
         """
         self.dbname = dbname
         self.user = user
         self.password = password
         self.host = host
         self.port = port
-        self.connection = None
-        self.cursor = None
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.pool = None
         # For FastAPI to easily check status if needed, without exposing psycopg2 objects directly
         self._is_connected = False
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self._open = set()      # ids of open connections handed out by the pool
+        # idle connections are kept here rather than handed back: psycopg2
+        # closes every connection returned beyond `minconn`
+        self._idle = []
+        self._stats = {"checkouts": 0, "in_use": 0, "timeouts": 0,
+                       "health_check_failures": 0, "reconnects": 0, "errors": 0}
+
+    def _dsn(self):
+        return dict(
+            dbname=self.dbname,
+            user=self.user,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+        )
 
     def connect(self):
         """
-        Establishes a connection to the PostgreSQL database.
+        Opens the connection pool.
 
         Returns:
             bool: True if connection is successful, False otherwise.
         """
-        if self.connection:
+        if self.pool:
             print("Already connected to the database.")
             self._is_connected = True
             return True
@@ -51,61 +97,180 @@ class PostgresDB:
             print(
                 f"Attempting to connect to database: {self.dbname}@{self.host}:{self.port} with user {self.user}"
             )
-            self.connection = psycopg2.connect(
-                dbname=self.dbname,
-                user=self.user,
-                password=self.password,
-                host=self.host,
-                port=self.port,
+            self.pool = pg_pool.ThreadedConnectionPool(
+                self.min_size, self.max_size, **self._dsn()
             )
-            self.cursor = self.connection.cursor()
+            warm = [self.pool.getconn() for _ in range(self.min_size)]
+            with self._lock:
+                self._open.update(id(c) for c in warm)
+                self._idle.extend(warm)
             self._is_connected = True
-            print("Successfully connected to the database.")
+            print(
+                f"Successfully connected to the database (pool {self.min_size}-{self.max_size})."
+            )
             return True
         except psycopg2.OperationalError as e:
             print(f"Error connecting to the database: {e}")
-            self.connection = None
-            self.cursor = None
+            self.pool = None
             self._is_connected = False
             return False
         except Exception as e:
             print(f"An unexpected error occurred during connection: {e}")
-            self.connection = None
-            self.cursor = None
+            self.pool = None
             self._is_connected = False
             return False
 
     def disconnect(self):
         """
-        Closes the database connection and cursor.
+        Closes every pooled connection.
 
         Returns:
             bool: True if disconnection is successful or if not connected, False otherwise.
         """
-        closed_something = False
-        if self.cursor:
-            try:
-                self.cursor.close()
-                self.cursor = None
-                print("Cursor closed.")
-                closed_something = True
-            except Exception as e:
-                print(f"Error closing cursor: {e}")
-                # Continue to attempt closing connection
-        if self.connection:
-            try:
-                self.connection.close()
-                self.connection = None
-                print("Database connection closed.")
-                closed_something = True
-            except Exception as e:
-                print(f"Error closing connection: {e}")
-
         self._is_connected = False
-        if not closed_something and not self.connection and not self.cursor:
+        if not self.pool:
             print("No active connection or cursor to disconnect.")
-            return True  # Considered successful if already disconnected
-        return True  # Assuming success if attempts were made, errors printed
+            return True
+        try:
+            self.pool.closeall()
+            print("Database connection pool closed.")
+        except Exception as e:
+            print(f"Error closing connection pool: {e}")
+        self.pool = None
+        self._last_used.clear()
+        with self._lock:
+            self._open.clear()
+            self._idle.clear()
+        return True
+
+    def _healthy(self, conn):
+        """Cheap check on checkout: closed flag, plus a ping if idle for long."""
+        if conn.closed:
+            return False
+        idle = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _take(self):
+        """Most recently used idle connection, or a new one from the pool."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.pool.getconn()
+
+    def _checkout(self):
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise pg_pool.PoolError("Timed out waiting for a free database connection")
+        try:
+            conn = self._take()
+            # after a server restart every idle connection may be dead
+            for _ in range(self.max_size):
+                if self._healthy(conn):
+                    break
+                with self._lock:
+                    self._stats["health_check_failures"] += 1
+                    self._stats["reconnects"] += 1
+                    self._open.discard(id(conn))
+                self._last_used.pop(id(conn), None)
+                self.pool.putconn(conn, close=True)
+                conn = self._take()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._open.add(id(conn))
+        return conn
+
+    def _checkin(self, conn, broken=False):
+        with self._lock:
+            self._stats["in_use"] -= 1
+            if broken or conn.closed:
+                self._open.discard(id(conn))
+        try:
+            if self.pool:
+                if broken or conn.closed:
+                    self._last_used.pop(id(conn), None)
+                    self.pool.putconn(conn, close=True)
+                else:
+                    self._last_used[id(conn)] = time.monotonic()
+                    with self._lock:
+                        self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def cursor(self):
+        """
+        A fresh cursor on a pooled connection for one unit of work.
+
+        The transaction is rolled back afterwards (these are read-only
+        queries), so an error never leaves an aborted connection in the
+        pool; connection-level failures discard the connection instead.
+        """
+        conn = self._checkout()
+        broken = False
+        try:
+            with conn.cursor() as cur:
+                yield cur
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            if not broken and not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            self._checkin(conn, broken)
+
+    def _query(self, sql, params=None):
+        """Run `sql` and fetch all rows; retried once on a dropped connection."""
+        for attempt in range(2):
+            try:
+                with self.cursor() as cur:
+                    cur.execute(sql, params)
+                    return cur.fetchall()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                if attempt:
+                    raise
+                with self._lock:
+                    self._stats["reconnects"] += 1
+
+    def pool_stats(self):
+        """
+        Pool counters for monitoring.
+
+        Returns:
+            dict: min/max size, open/idle/in-use connections and counters for
+                  checkouts, timeouts, failed health checks, reconnects and errors.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            n_open = len(self._open)
+        stats.update(
+            min_size=self.min_size,
+            max_size=self.max_size,
+            idle=n_open - stats["in_use"],
+            open=n_open,
+        )
+        return stats
 
     def get_all_tables(self):
         """
@@ -115,22 +280,19 @@ class PostgresDB:
             list: A list of table names. Returns an empty list if no tables
                   are found or if an error occurs or not connected.
         """
-        if not self._is_connected or not self.cursor:
+        if not self._is_connected or not self.pool:
             print("Not connected to the database. Please connect first.")
             return []
         try:
-            self.cursor.execute("""
+            rows = self._query("""
                 SELECT tablename
                 FROM pg_catalog.pg_tables
                 WHERE schemaname != 'pg_catalog' AND schemaname != 'information_schema';
             """)
-            tables = [table[0] for table in self.cursor.fetchall()]
+            tables = [table[0] for table in rows]
             return tables
         except psycopg2.Error as e:
             print(f"Error fetching tables: {e}")
-            # If a query fails, the connection might be in an unusable state.
-            # Depending on the error, a reconnect might be needed.
-            # For simplicity here, we just return empty.
             return []
         except Exception as e:
             print(f"An unexpected error occurred while fetching tables: {e}")
@@ -147,7 +309,7 @@ class PostgresDB:
             list: A list of column names. Returns an empty list if the table
                   does not exist, has no columns, or if an error occurs or not connected.
         """
-        if not self._is_connected or not self.cursor:
+        if not self._is_connected or not self.pool:
             print("Not connected to the database. Please connect first.")
             return []
         if not table_name or not isinstance(table_name, str):
@@ -155,7 +317,7 @@ class PostgresDB:
             return []
         try:
             # Check if table exists
-            self.cursor.execute(
+            table_exists_result = self._query(
                 """
                     SELECT EXISTS (
                         SELECT 1
@@ -165,9 +327,7 @@ class PostgresDB:
                 """,
                 (table_name,),
             )
-            # Fetch the result and check if it's None before accessing index [0]
-            table_exists_result = self.cursor.fetchone()
-            if table_exists_result is None or not table_exists_result[0]:
+            if not table_exists_result or not table_exists_result[0][0]:
                 print(
                     f"Table '{table_name}' does not exist in user schemas or query failed."
                 )
@@ -179,8 +339,7 @@ class PostgresDB:
                     WHERE table_name = %s
                     ORDER BY ordinal_position;
                 """
-            self.cursor.execute(query, (table_name,))
-            columns = [column[0] for column in self.cursor.fetchall()]
+            columns = [column[0] for column in self._query(query, (table_name,))]
             return columns
         except psycopg2.Error as e:
             print(f"Error fetching columns for table '{table_name}': {e}")
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from .engine_registry import get_engine
+
+
+def embedding_key(text_: str, model_name: str) -> str:
+    """Content address of one serialized row: sha256(model ␀ text)."""
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(text_.encode("utf-8"))
+    return h.hexdigest()
+
+
+class FileEmbeddingStore:
+    """
+    Local fallback store: a single SQLite file holding `key → vector` rows.
+    Vectors are kept as JSON text so the file stays inspectable.
+    """
+
+    def __init__(self, path: str = ".cache/embeddings.sqlite"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, embedding TEXT NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock, self._connect() as conn:
+            for i in range(0, len(keys), 500):      # SQLite parameter limit
+                chunk = list(keys[i:i + 500])
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, embedding FROM embedding_cache WHERE key IN ({marks})",
+                    chunk,
+                )
+                for k, emb in rows:
+                    found[k] = json.loads(emb)
+        return found
+
+    def put_many(self, model_name: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, model, embedding) VALUES (?, ?, ?)",
+                [(k, model_name, json.dumps(list(map(float, v)))) for k, v in items.items()],
+            )
+
+
+class PostgresEmbeddingStore:
+    """
+    Store backed by the pgvector image from docker-compose.  Vectors are
+    written as pgvector literals and read back via `::text`, so no extra
+    client-side adapter is needed.
+    """
+
+    def __init__(self, db_url: str, table: str = "embedding_cache"):
+        self.engine = get_engine(db_url)
+        self.table = table
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " embedding vector NOT NULL,"
+                " created_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+            ))
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text(f"SELECT key, embedding::text FROM {self.table} WHERE key = ANY(:keys)"),
+                {"keys": list(keys)},
+            )
+            return {k: json.loads(emb) for k, emb in rows}
+
+    def put_many(self, model_name: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        rows = [
+            {"k": k, "m": model_name, "e": json.dumps(list(map(float, v)))}
+            for k, v in items.items()
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"INSERT INTO {self.table} (key, model, embedding) "
+                    "VALUES (:k, :m, CAST(:e AS vector)) ON CONFLICT (key) DO NOTHING"
+                ),
+                rows,
+            )
+
+
+def default_embedding_store(db_url: Optional[str] = None,
+                            path: str = ".cache/embeddings.sqlite"):
+    """Postgres when reachable, otherwise the local SQLite file."""
+    if db_url:
+        try:
+            return PostgresEmbeddingStore(db_url)
+        except SQLAlchemyError as e:
+            print(f"⚠️  Embedding cache falling back to {path}: {e}")
+    return FileEmbeddingStore(path)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed front for an embedder: only texts whose
+    (model, text) hash is not yet stored are sent to `embed_fn`.
+    """
+
+    def __init__(self, store, model_name: str):
+        self.store = store
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+
+    def embed(
+        self,
+        texts: Sequence[str],
+        embed_fn: Callable[[List[str]], Iterable[Sequence[float]]],
+    ) -> List[List[float]]:
+        keys = [embedding_key(t, self.model_name) for t in texts]
+        cached = self.store.get_many(list(dict.fromkeys(keys)))
+
+        # unique misses only – duplicate rows are embedded once
+        miss: Dict[str, str] = {}
+        for k, t in zip(keys, texts):
+            if k not in cached and k not in miss:
+                miss[k] = t
+
+        n_hit = sum(k in cached for k in keys)
+        self.hits += n_hit
+        self.misses += len(keys) - n_hit
+
+        if miss:
+            fresh = dict(zip(miss.keys(), embed_fn(list(miss.values()))))
+            self.store.put_many(self.model_name, fresh)
+            cached.update(fresh)
+
+        return [list(cached[k]) for k in keys]
@@ -0,0 +1,148 @@
+import asyncio
+import inspect
+import random
+import time
+from typing import Callable, List, Optional, Sequence
+
+from .async_utils import run_blocking
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_RETRYABLE_MARKERS = ("429", "resource_exhausted", "rate limit", "quota exceeded",
+                      "503", "service unavailable", "internal server error",
+                      "deadline exceeded")
+
+
+def _status_of(exc: BaseException) -> Optional[int]:
+    for attr in ("status_code", "code", "status"):
+        val = getattr(exc, attr, None)
+        if isinstance(val, int):
+            return val
+    resp = getattr(exc, "response", None)
+    val = getattr(resp, "status_code", None)
+    return val if isinstance(val, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for throttling (429) and transient server errors (5xx)."""
+    status = _status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    msg = str(exc).lower()
+    return any(m in msg for m in _RETRYABLE_MARKERS)
+
+
+class _AdaptiveLimiter:
+    """
+    AIMD concurrency gate: halves the number of in-flight batches on a
+    throttle and grows it back by one after `limit` clean completions.
+    A throttle also pauses every worker until the back-off window ends.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max = max_concurrency
+        self.limit = max_concurrency
+        self.in_flight = 0
+        self._streak = 0
+        self._resume_at = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        pause = self._resume_at - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    async def release(self, ok: bool) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            if ok:
+                self._streak += 1
+                if self._streak >= self.limit and self.limit < self.max:
+                    self.limit += 1
+                    self._streak = 0
+            self._cond.notify_all()
+
+    def throttle(self, delay: float) -> None:
+        self.limit = max(1, self.limit // 2)
+        self._streak = 0
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+
+class EmbeddingScheduler:
+    """
+    Splits texts into batches and embeds them concurrently.
+
+    Args:
+        embed_fn: `embed_documents`-style callable (sync or async) taking a
+            list of texts and returning one vector per text.
+        batch_size: Texts per request.
+        max_concurrency: Upper bound on in-flight requests.
+        max_retries: Attempts per batch on 429/5xx before giving up.
+        base_delay / max_delay: Exponential back-off bounds in seconds.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Sequence[Sequence[float]]],
+        batch_size: int = 100,
+        max_concurrency: int = 8,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        if batch_size < 1 or max_concurrency < 1:
+            raise ValueError("batch_size and max_concurrency must be >= 1")
+        self.embed_fn = embed_fn
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    async def _call(self, batch: List[str]):
+        if inspect.iscoroutinefunction(self.embed_fn):
+            return await self.embed_fn(batch)
+        return await asyncio.to_thread(self.embed_fn, batch)
+
+    async def _run_batch(self, limiter: _AdaptiveLimiter, batch: List[str]):
+        attempt = 0
+        while True:
+            await limiter.acquire()
+            try:
+                vectors = await self._call(batch)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    await limiter.release(ok=False)
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)            # jitter
+                limiter.throttle(delay)
+                await limiter.release(ok=False)
+                attempt += 1
+                self.retries += 1
+                continue
+            await limiter.release(ok=True)
+            vectors = list(vectors)
+            if len(vectors) != len(batch):
+                raise RuntimeError(
+                    f"Embedder returned {len(vectors)} vectors for {len(batch)} texts"
+                )
+            return vectors
+
+    async def aembed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed `texts`; the result is in input order."""
+        texts = list(texts)
+        batches = [texts[i:i + self.batch_size]
+                   for i in range(0, len(texts), self.batch_size)]
+        limiter = _AdaptiveLimiter(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self._run_batch(limiter, b) for b in batches)
+        )
+        return [v for chunk in results for v in chunk]
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Blocking wrapper, safe to call from inside a running event loop."""
+        return run_blocking(lambda: self.aembed(texts))
@@ -0,0 +1,75 @@
+import os
+import threading
+from typing import Any, Dict
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+# Pool sizing for every engine handed out below (per process, per URL).
+POOL_SIZE     = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW  = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT  = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE  = int(os.getenv("DB_POOL_RECYCLE", "1800"))    # seconds
+
+_engines: Dict[str, Engine] = {}
+_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def _reset_after_fork() -> None:
+    """Forked workers must not share the parent's sockets: start afresh."""
+    global _pid
+    if os.getpid() != _pid:
+        for engine in _engines.values():
+            engine.dispose(close=False)
+        _engines.clear()
+        _pid = os.getpid()
+
+
+def get_engine(url: str, **kwargs: Any) -> Engine:
+    """
+    The shared SQLAlchemy engine for `url`, created on first use with
+    pre-ping, recycling and the pool sizes above.  `kwargs` override the
+    `create_engine` arguments on that first call only.
+    """
+    url = str(url)
+    with _lock:
+        _reset_after_fork()
+        engine = _engines.get(url)
+        if engine is None:
+            options = dict(
+                pool_size=POOL_SIZE,
+                max_overflow=MAX_OVERFLOW,
+                pool_timeout=POOL_TIMEOUT,
+                pool_recycle=POOL_RECYCLE,
+                pool_pre_ping=True,
+            )
+            if url.startswith("sqlite"):
+                options = {}
+            options.update(kwargs)
+            engine = _engines[url] = create_engine(url, **options)
+        return engine
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection (application shutdown)."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def engine_metrics() -> Dict[str, Dict[str, Any]]:
+    """Pool counters per engine, keyed on the URL without password."""
+    with _lock:
+        engines = list(_engines.values())
+    out = {}
+    for engine in engines:
+        pool = engine.pool
+        stats = {"status": pool.status()}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(pool, name, None)
+            if callable(fn):
+                stats[name] = fn()
+        out[engine.url.render_as_string(hide_password=True)] = stats
+    return out
@@ -0,0 +1,302 @@
+import importlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+# ─────────────────────────── background jobs ───────────────────────────
+# Long pipeline runs (embed → cluster → name → write) execute in a process
+# pool so they never hold an API worker or its GIL.  Job state lives in a
+# local SQLite file that both the API process and the pool processes
+# write, so it survives restarts: on start-up, jobs whose process is gone
+# are marked "interrupted" and queued jobs are submitted again.
+
+QUEUED, RUNNING = "queued", "running"
+SUCCEEDED, FAILED, CANCELLED, INTERRUPTED = "succeeded", "failed", "cancelled", "interrupted"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED, INTERRUPTED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by its progress callback once cancel is requested."""
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """Job rows in one SQLite file, shared by the API and pool processes."""
+
+    def __init__(self, path: str = ".cache/jobs.sqlite"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        with self._lock, self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, target TEXT NOT NULL, params TEXT NOT NULL,"
+                " status TEXT NOT NULL, stage TEXT, progress TEXT NOT NULL DEFAULT '{}',"
+                " result TEXT, error TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0,"
+                " owner_pid INTEGER, worker_pid INTEGER,"
+                " created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _row(cur, row) -> Dict[str, Any]:
+        job = dict(zip([c[0] for c in cur.description], row))
+        job["params"] = json.loads(job["params"])
+        job["progress"] = json.loads(job["progress"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def create(self, target: str, params: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, target, params, status, owner_pid, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, target, json.dumps(params), QUEUED, os.getpid(), time.time()),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock, self._connect() as conn:
+            cur = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cur.fetchone()
+            return self._row(cur, row) if row else None
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock, self._connect() as conn:
+            cur = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+            return [self._row(cur, r) for r in cur.fetchall()]
+
+    def start(self, job_id: str) -> bool:
+        """Queued → running in the calling process; False if it was cancelled."""
+        with self._lock, self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, worker_pid = ?, started_at = ?"
+                " WHERE id = ? AND status = ? AND cancel_requested = 0",
+                (RUNNING, os.getpid(), time.time(), job_id, QUEUED),
+            ).rowcount == 1
+
+    def report(self, job_id: str, stage: str, counters: Dict[str, Any]) -> bool:
+        """
+        Record `counters` for `stage` (merged into that stage's entry) and
+        return whether cancellation has been requested.
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT progress, cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            progress = json.loads(row[0])
+            progress.setdefault(stage, {}).update(counters)
+            conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ? WHERE id = ?",
+                (stage, json.dumps(progress, default=str), job_id),
+            )
+            return bool(row[1])
+
+    def finish(self, job_id: str, status: str, result: Any = None,
+               error: Optional[str] = None) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?"
+                " WHERE id = ? AND status IN (?, ?)",
+                (status, json.dumps(result, default=str) if result is not None else None,
+                 error, time.time(), job_id, QUEUED, RUNNING),
+            )
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Flag an unfinished job for cancellation; False if unknown or done."""
+        with self._lock, self._connect() as conn:
+            return conn.execute(
+                f"UPDATE jobs SET cancel_requested = 1"
+                f" WHERE id = ? AND status NOT IN ({','.join('?' * len(FINISHED))})",
+                (job_id, *FINISHED),
+            ).rowcount == 1
+
+    def recover(self) -> List[str]:
+        """
+        After a restart: running jobs whose worker is gone become
+        "interrupted"; queued jobs whose owner is gone are adopted by this
+        process.  Returns the adopted job ids.
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, status, owner_pid, worker_pid, cancel_requested FROM jobs"
+                " WHERE status IN (?, ?)", (QUEUED, RUNNING),
+            ).fetchall()
+            adopted = []
+            for job_id, status, owner_pid, worker_pid, cancel in rows:
+                if status == RUNNING and not _pid_alive(worker_pid):
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                        (INTERRUPTED, "worker process exited before the job finished",
+                         time.time(), job_id),
+                    )
+                elif status == QUEUED and not _pid_alive(owner_pid):
+                    if cancel:
+                        conn.execute(
+                            "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ?",
+                            (CANCELLED, time.time(), job_id),
+                        )
+                        continue
+                    conn.execute("UPDATE jobs SET owner_pid = ? WHERE id = ?",
+                                 (os.getpid(), job_id))
+                    adopted.append(job_id)
+            return adopted
+
+
+def _resolve(target: str):
+    module, _, name = target.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _run_job(store_path: str, job_id: str, target: str, params: Dict[str, Any]) -> None:
+    """Pool-process entry point: run `target(**params, progress=...)`."""
+    store = JobStore(store_path)
+    if not store.start(job_id):
+        job = store.get(job_id)
+        if job is not None and job["status"] == QUEUED:      # cancelled while queued
+            store.finish(job_id, CANCELLED)
+        return
+
+    def progress(stage: str, **counters) -> None:
+        if store.report(job_id, stage, counters):
+            raise JobCancelled(job_id)
+
+    try:
+        result = _resolve(target)(**params, progress=progress)
+    except JobCancelled:
+        store.finish(job_id, CANCELLED)
+    except BaseException as e:
+        store.finish(job_id, FAILED, error="".join(
+            traceback.format_exception_only(type(e), e)).strip())
+        if not isinstance(e, Exception):
+            raise
+    else:
+        store.finish(job_id, SUCCEEDED, result=result)
+
+
+class JobRunner:
+    """
+    Args:
+        store: Job table (see JobStore).
+        max_workers: Pool processes, i.e. jobs running at once.
+
+    A job is any importable `"module:function"` accepting a `progress`
+    keyword: `progress(stage, **counters)` records per-stage counters and
+    raises JobCancelled once a cancel was requested, so cancellation takes
+    effect at the job's next progress report.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 1):
+        self.store = store
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._closing = False
+        for job_id in store.recover():
+            job = store.get(job_id)
+            self._submit(job_id, job["target"], job["params"])
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the API process has threads and open
+        # SQLite/Postgres handles that a forked child must not reuse
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _submit(self, job_id: str, target: str, params: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._closing:
+                return                   # stays queued, adopted after restart
+            if self._pool is None:
+                self._pool = self._new_pool()
+            try:
+                future = self._pool.submit(_run_job, self.store.path, job_id, target, params)
+            except BrokenProcessPool:    # a worker died; its callbacks may not have run yet
+                self._pool.shutdown(wait=False)
+                self._pool = self._new_pool()
+                future = self._pool.submit(_run_job, self.store.path, job_id, target, params)
+            pool = self._pool
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._done(job_id, f, pool))
+
+    def _done(self, job_id: str, future: Future, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+        if future.cancelled():
+            if not self._closing:        # on shutdown, queued jobs stay queued
+                self.store.finish(job_id, CANCELLED)
+            return
+        error = future.exception()
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            # a worker died (e.g. OOM kill) and took the pool with it: drop
+            # the pool so the next submit starts a fresh one
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False)
+            job = self.store.get(job_id)
+            if (job is not None and job["status"] == QUEUED
+                    and not job["cancel_requested"] and not self._closing):
+                self._submit(job_id, job["target"], job["params"])   # never started
+                return
+        self.store.finish(job_id, FAILED, error=repr(error))
+
+    def submit(self, target: str, **params) -> str:
+        job_id = self.store.create(target, params)
+        try:
+            self._submit(job_id, target, params)
+        except Exception as e:
+            self.store.finish(job_id, FAILED, error=repr(e))
+            raise
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.store.list(limit)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job now, a running one at its next progress report."""
+        if not self.store.request_cancel(job_id):
+            return False
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()              # only succeeds while still queued
+        return True
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            self._closing = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
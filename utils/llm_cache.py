@@ -0,0 +1,315 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+from sqlalchemy import text
+
+from .engine_registry import get_engine
+
+
+# ─────────────────────────── key helpers ───────────────────────────
+def _collapse(obj):
+    if isinstance(obj, str):
+        return " ".join(obj.split())
+    if isinstance(obj, list):
+        return [_collapse(v) for v in obj]
+    if isinstance(obj, dict):
+        return {k: _collapse(v) for k, v in obj.items()}
+    return obj
+
+def normalize_prompt(prompt: str) -> str:
+    """Whitespace-insensitive prompt text (chat prompts arrive as JSON)."""
+    try:
+        return json.dumps(_collapse(json.loads(prompt)), sort_keys=True)
+    except ValueError:
+        return " ".join(prompt.split())
+
+def model_and_temperature(llm_string: str) -> Tuple[str, Optional[float], str]:
+    """(model, temperature, remaining call params) parsed from `llm_string`."""
+    head, _, params = llm_string.partition("---")
+    model, temp = None, None
+    try:
+        kw = json.loads(head).get("kwargs", {})
+        model = kw.get("model") or kw.get("model_name")
+        temp = kw.get("temperature")
+    except (ValueError, AttributeError):
+        pass
+    m = re.search(r"\('temperature', ([-+0-9.eE]+)\)", params)
+    if m:
+        temp = float(m.group(1))
+    m = re.search(r"\('model(?:_name)?', '([^']+)'\)", params)
+    if m and not model:
+        model = m.group(1)
+    return model or head, temp, params
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    model, temp, params = model_and_temperature(llm_string)
+    payload = json.dumps([model, temp, params, normalize_prompt(prompt)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ─────────────────────────── backends ──────────────────────────────
+class SQLiteLLMCacheBackend:
+    """Disk backend: one SQLite file, safe across threads of one process."""
+
+    def __init__(self, path: str = ".cache/llm_cache.sqlite"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, model TEXT, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_hit_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE llm_cache SET last_hit_at = ? WHERE key = ?",
+                             (time.time(), key))
+            return row
+
+    def put(self, key: str, model: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                (key, model, value, now, now),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def evict(self, max_entries: int, ttl: Optional[float]) -> None:
+        with self._lock, self._connect() as conn:
+            if ttl:
+                conn.execute("DELETE FROM llm_cache WHERE created_at < ?",
+                             (time.time() - ttl,))
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_hit_at DESC LIMIT -1 OFFSET ?)",
+                (max_entries,),
+            )
+
+    def size(self) -> int:
+        with self._lock, self._connect() as conn:
+            return conn.execute("SELECT count(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+
+class PostgresLLMCacheBackend:
+    """Shared backend: an `llm_cache` table in the app database."""
+
+    def __init__(self, db_url: str, table: str = "llm_cache"):
+        self.engine = get_engine(db_url)
+        self.table = table
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " key TEXT PRIMARY KEY, model TEXT, value TEXT NOT NULL,"
+                " created_at TIMESTAMPTZ NOT NULL DEFAULT now(),"
+                " last_hit_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+            ))
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                text(
+                    f"UPDATE {self.table} SET last_hit_at = now() WHERE key = :k "
+                    "RETURNING value, extract(epoch FROM created_at)"
+                ),
+                {"k": key},
+            ).fetchone()
+        return (row[0], float(row[1])) if row else None
+
+    def put(self, key: str, model: str, value: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"INSERT INTO {self.table} (key, model, value) VALUES (:k, :m, :v) "
+                    "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value,"
+                    " created_at = now(), last_hit_at = now()"
+                ),
+                {"k": key, "m": model, "v": value},
+            )
+
+    def delete(self, key: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {self.table} WHERE key = :k"), {"k": key})
+
+    def evict(self, max_entries: int, ttl: Optional[float]) -> None:
+        with self.engine.begin() as conn:
+            if ttl:
+                conn.execute(
+                    text(f"DELETE FROM {self.table} "
+                         "WHERE created_at < now() - make_interval(secs => :ttl)"),
+                    {"ttl": ttl},
+                )
+            conn.execute(
+                text(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f" SELECT key FROM {self.table} ORDER BY last_hit_at DESC OFFSET :n)"
+                ),
+                {"n": max_entries},
+            )
+
+    def size(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT count(*) FROM {self.table}")).scalar_one()
+
+    def clear(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {self.table}"))
+
+
+# ─────────────────────────── the cache ─────────────────────────────
+class LLMResponseCache(BaseCache):
+    """
+    LangChain cache shared by every chat model in the process.
+
+    Keys are model + temperature + call params + whitespace-normalized
+    prompt.  A small in-process LRU sits in front of the persistent
+    backend; both honour `ttl_seconds`, and the backend is trimmed to
+    `max_entries` (least recently hit first).  By default only
+    temperature-0 calls are cached, since only those are deterministic.
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_entries: int = 10_000,
+        ttl_seconds: Optional[float] = None,
+        memory_entries: int = 1_000,
+        only_deterministic: bool = True,
+        evict_every: int = 100,
+    ):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.memory_entries = memory_entries
+        self.only_deterministic = only_deterministic
+        self.evict_every = evict_every
+        self._lru: "OrderedDict[str, Tuple[RETURN_VAL_TYPE, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def _cacheable(self, llm_string: str) -> bool:
+        if not self.only_deterministic:
+            return True
+        _, temp, _ = model_and_temperature(llm_string)
+        return temp is not None and float(temp) == 0.0
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl) and time.time() - created_at > self.ttl
+
+    def _remember(self, key: str, value: RETURN_VAL_TYPE, created_at: float) -> None:
+        self._lru[key] = (value, created_at)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.memory_entries:
+            self._lru.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if not self._cacheable(llm_string):
+            with self._lock:
+                self.skipped += 1
+            return None
+        key = cache_key(prompt, llm_string)
+
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry and not self._expired(entry[1]):
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._lru.pop(key, None)
+
+        row = self.backend.get(key)
+        if row and self._expired(row[1]):
+            self.backend.delete(key)
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            value = [loads(g) for g in json.loads(row[0])]
+            self._remember(key, value, row[1])
+            self.hits += 1
+            return value
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if not self._cacheable(llm_string):
+            return
+        key = cache_key(prompt, llm_string)
+        model, _, _ = model_and_temperature(llm_string)
+        self.backend.put(key, model, json.dumps([dumps(g) for g in return_val]))
+        with self._lock:
+            self._remember(key, return_val, time.time())
+            self._writes += 1
+            trim = self._writes % self.evict_every == 0
+        if trim:
+            self.backend.evict(self.max_entries, self.ttl)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._lru.clear()
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped_nondeterministic": self.skipped,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._lru),
+            "stored_entries": self.backend.size(),
+        }
+
+
+def install_llm_cache(
+    backend: str = "sqlite",
+    db_url: Optional[str] = None,
+    path: str = ".cache/llm_cache.sqlite",
+    **kwargs,
+) -> Optional[LLMResponseCache]:
+    """
+    Install one process-wide `LLMResponseCache` (idempotent).
+    `backend` is "sqlite", "postgres" or "off".
+    """
+    current = get_llm_cache()
+    if isinstance(current, LLMResponseCache):
+        return current
+    if backend == "off":
+        return None
+    if backend == "postgres":
+        store = PostgresLLMCacheBackend(db_url)
+    elif backend == "sqlite":
+        store = SQLiteLLMCacheBackend(path)
+    else:
+        raise ValueError(f"Unknown LLM cache backend: {backend}")
+    cache = LLMResponseCache(store, **kwargs)
+    set_llm_cache(cache)
+    return cache
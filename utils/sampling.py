@@ -0,0 +1,93 @@
+from typing import List, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+# TABLESAMPLE SYSTEM picks whole pages, so row counts vary more than with
+# BERNOULLI; ask for a bit more than needed and trim with LIMIT.  The trim
+# orders the sampled rows by a seeded hash first – a bare LIMIT would stop
+# the scan early and keep only the physically first pages.
+_OVERSAMPLE = {"system": 3.0, "bernoulli": 1.5}
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def estimate_rows(engine, table_name: str) -> int:
+    """Planner row estimate (`pg_class.reltuples`), exact count if unknown."""
+    with engine.connect() as conn:
+        est = conn.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:t)"),
+            {"t": table_name},
+        ).scalar()
+        if est is None or est <= 0:             # never analyzed / empty
+            est = conn.execute(text(f"SELECT count(*) FROM {table_name}")).scalar()
+    return int(est)
+
+
+def sample_table(
+    engine,
+    table_name: str,
+    n: int = 1000,
+    method: str = "bernoulli",
+    seed: int = 42,
+    stratify_by: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Roughly `n` random rows of `table_name`, sampled inside Postgres.
+
+    Args:
+        method: "bernoulli" (row-level, even) or "system" (page-level, cheaper).
+        seed: `REPEATABLE` seed – the same seed returns the same rows as long
+            as the table is unchanged.
+        stratify_by: Optional column; each of its values gets a share of `n`
+            proportional to its frequency; NULL is a stratum of its own.
+            Values rarer than the sampling rate may still come back empty.
+        columns: Columns to select (default all).
+    """
+    method = method.lower()
+    if method not in _OVERSAMPLE:
+        raise ValueError(f"Unknown TABLESAMPLE method: {method}")
+    cols = ", ".join(_quote_ident(c) for c in columns) if columns else "*"
+
+    total = estimate_rows(engine, table_name)
+    if total <= n:
+        with engine.connect() as conn:
+            return pd.read_sql(text(f"SELECT {cols} FROM {table_name}"), conn)
+
+    pct = min(100.0, 100.0 * _OVERSAMPLE[method] * n / total)
+    sampled = (
+        f"FROM {table_name} TABLESAMPLE {method.upper()} ({pct:.6f}) "
+        f"REPEATABLE ({int(seed)})"
+    )
+
+    shuffle = "md5(ctid::text || :seed)"
+    params = {"seed": str(seed)}
+    if stratify_by is None:
+        q = text(f"SELECT {cols} {sampled} ORDER BY {shuffle} LIMIT {int(n)}")
+    else:
+        # quotas come from the stratum frequencies within the sample itself,
+        # so no extra pass over the full table is needed
+        strat = _quote_ident(stratify_by)
+        inner_cols = cols
+        if columns and stratify_by not in columns:
+            inner_cols = f"{cols}, {strat}"
+        q = text(
+            f"SELECT s.* FROM ("
+            f" SELECT {inner_cols},"
+            f"  row_number() OVER (PARTITION BY {strat} ORDER BY {shuffle}) AS _rn,"
+            f"  count(*) OVER (PARTITION BY {strat}) AS _stratum_n,"
+            f"  count(*) OVER () AS _sample_n"
+            f" {sampled}"
+            f") s WHERE s._rn <= greatest(1, round(:n * s._stratum_n::numeric / s._sample_n))"
+        )
+        params["n"] = int(n)
+
+    with engine.connect() as conn:
+        df = pd.read_sql(q, conn, params=params)
+    df = df.drop(columns=["_rn", "_stratum_n", "_sample_n"], errors="ignore")
+    if columns and stratify_by and stratify_by not in columns:
+        df = df.drop(columns=[stratify_by])
+    return df
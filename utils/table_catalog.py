@@ -0,0 +1,154 @@
+import json
+from typing import Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+from .sampling import sample_table
+
+# information_schema.columns.data_type values pandas reads as numeric
+# (pandas counts booleans as numeric too)
+NUMERIC_TYPES = {
+    "smallint", "integer", "bigint", "numeric", "decimal", "real",
+    "double precision", "money", "boolean",
+}
+# types whose pandas dtype can't be told from the catalog alone
+AMBIGUOUS_TYPES = {"USER-DEFINED", "ARRAY", "unknown"}
+INTEGER_TYPES = {"smallint", "integer", "bigint"}
+FLOAT_TYPES = {"numeric", "decimal", "real", "double precision"}
+JSON_TYPES = {"json", "jsonb"}
+TEXT_TYPES = {"text", "character varying", "character"}
+
+
+def _is_id_name(col: str) -> bool:
+    lc = col.lower()
+    return lc == "id" or lc.endswith("_id")
+
+
+def table_columns(engine, table_name: str, schema: Optional[str] = None) -> List[Dict]:
+    """Column name/type rows from information_schema, in table order."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT column_name, data_type, udt_name
+                FROM information_schema.columns
+                WHERE table_name = :t
+                  AND table_schema = coalesce(:s, current_schema())
+                ORDER BY ordinal_position
+                """
+            ),
+            {"t": table_name, "s": schema},
+        ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def column_stats(engine, table_name: str, schema: Optional[str] = None) -> Dict[str, Dict]:
+    """`pg_stats` null_frac / n_distinct per column ({} if never analyzed)."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT attname, null_frac, n_distinct
+                FROM pg_stats
+                WHERE tablename = :t
+                  AND schemaname = coalesce(:s, current_schema())
+                """
+            ),
+            {"t": table_name, "s": schema},
+        ).mappings().all()
+    return {r["attname"]: dict(r) for r in rows}
+
+
+def detect_classification_columns(
+    engine,
+    table_name: str,
+    schema: Optional[str] = None,
+    sample_rows: int = 500,
+) -> List[str]:
+    """
+    Non-ID, non-numeric columns of `table_name`, decided from the catalog
+    instead of loading the table:
+
+    • ID     – name is `id` / `*_id`, or type is uuid
+    • numeric – numeric/boolean `data_type`
+    • empty  – `pg_stats.null_frac` = 1 (nothing to classify on)
+
+    Only columns whose type is ambiguous (enums, arrays, extensions) or
+    tables without statistics are checked on a small TABLESAMPLE.
+    """
+    columns = table_columns(engine, table_name, schema)
+    stats = column_stats(engine, table_name, schema)
+
+    keep: List[str] = []
+    to_sample: List[str] = []
+    for c in columns:
+        name, dtype = c["column_name"], c["data_type"]
+        if _is_id_name(name) or c["udt_name"] == "uuid":
+            continue
+        if dtype in NUMERIC_TYPES:
+            continue
+        st = stats.get(name)
+        if st is not None and (st["null_frac"] or 0) >= 1.0:
+            continue
+        if dtype in AMBIGUOUS_TYPES or st is None:
+            to_sample.append(name)
+        keep.append(name)
+
+    if to_sample:
+        target = f"{schema}.{table_name}" if schema else table_name
+        sample = sample_table(engine, target, sample_rows, method="system",
+                              columns=to_sample)
+        for name in to_sample:
+            ser = sample[name].dropna()
+            if not sample.empty and (ser.empty or pd.api.types.is_numeric_dtype(ser)):
+                keep.remove(name)
+    return keep
+
+
+def _is_json_object(v) -> bool:
+    if isinstance(v, dict):
+        return True
+    try:
+        return isinstance(json.loads(v), dict)
+    except (TypeError, ValueError):
+        return False
+
+
+def column_kinds(
+    engine,
+    table_name: str,
+    schema: Optional[str] = None,
+    sample_rows: int = 200,
+) -> Dict[str, str]:
+    """
+    integer | float | boolean | json | text for every column, decided once
+    per table so that every chunk of it is treated alike.  json/jsonb
+    columns are "json"; text columns become "json" too when most sampled
+    values are JSON objects.
+    """
+    columns = table_columns(engine, table_name, schema)
+    kinds: Dict[str, str] = {}
+    for c in columns:
+        dtype = c["data_type"]
+        if dtype in INTEGER_TYPES:
+            kinds[c["column_name"]] = "integer"
+        elif dtype in FLOAT_TYPES:
+            kinds[c["column_name"]] = "float"
+        elif dtype == "boolean":
+            kinds[c["column_name"]] = "boolean"
+        elif dtype in JSON_TYPES:
+            kinds[c["column_name"]] = "json"
+        else:
+            kinds[c["column_name"]] = "text"
+
+    to_sample = [c["column_name"] for c in columns if c["data_type"] in TEXT_TYPES]
+    if to_sample:
+        target = f"{schema}.{table_name}" if schema else table_name
+        sample = sample_table(engine, target, sample_rows, method="system",
+                              columns=to_sample)
+        for name in to_sample:
+            ser = sample[name].dropna()
+            if not ser.empty and ser.map(_is_json_object).mean() > 0.5:
+                kinds[name] = "json"
+    return kinds